@@ -0,0 +1,3 @@
+# api/_lib/__init__.py
+# Gemeinsamer Code für die Serverless-Handler in api/.
+# Verzeichnisse mit "_" werden von Vercel nicht als Endpoints deployed.
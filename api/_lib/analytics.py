@@ -0,0 +1,157 @@
+# api/_lib/analytics.py
+"""
+Portfolio-Kennzahlen über die Watchlist (/api/analytics).
+
+Grundlage ist eine ausgerichtete Close-Matrix [Tage, Ticker] über das letzte
+Jahr: Vereinigung der Handelstage aller Serien, Lücken (Feiertage einer
+Börse) mit dem letzten Close gefüllt, vorn abgeschnitten, bis jede Spalte
+einen Wert hat. Daraus, alles vektorisiert mit numpy:
+
+- Tagesrenditen R = M[1:] / M[:-1] - 1, Portfolio r = R @ w
+- Volatilität:   Standardabweichung der Tagesrenditen * sqrt(252), in %
+- Max Drawdown:  tiefster Abstand der kumulierten Rendite zum bisherigen Hoch, in %
+- Beta:          cov(r, r_bench) / var(r_bench) gegen BENCHMARK
+- Korrelation:   np.corrcoef der Tagesrenditen
+
+Gewichte sind Market Caps (in USD umgerechnet, fx.py); fehlt auch nur eine,
+wird gleich gewichtet. Matrix und Ergebnis werden pro Eingangsstand gemerkt
+(Serienstand je Ticker, Tag, Gewichte): ein Refresh ohne neue Bars
+rechnet nichts neu, pro Besucher bleibt ohnehin nur der Snapshot.
+
+Ohne numpy (MARKET_SLIM=1) gibt es keine Analytics.
+"""
+import math
+import threading
+from datetime import date
+
+from .metrics import np
+
+BENCHMARK = "^GSPC"
+TRADING_DAYS = 252
+LOOKBACK_DAYS = 365
+
+
+def _signature(bars):
+    """Serienstand eines Tickers: Länge, erster/letzter Tag, letzter Close."""
+    if not bars or not len(bars[0]):
+        return None
+    dates, closes = bars
+    return len(dates), dates[0], dates[-1], float(closes[-1])
+
+
+def align(bars_by_ticker, tickers, today: date):
+    """
+    -> (days int64 [T], closes float64 [T, n]) über die gemeinsamen Tage seit
+    today - LOOKBACK_DAYS; Ticker ohne Serie müssen vorher aussortiert sein.
+    """
+    start = today.toordinal() - LOOKBACK_DAYS
+    cols = []
+    for tk in tickers:
+        dates, closes = bars_by_ticker[tk]
+        d = np.asarray(dates, dtype=np.int64)
+        c = np.asarray(closes, dtype=np.float64)
+        keep = d >= start
+        cols.append((d[keep], c[keep]))
+    days = np.unique(np.concatenate([d for d, _ in cols])) if cols else np.zeros(0, dtype=np.int64)
+    m = np.full((len(days), len(cols)), np.nan, dtype=np.float64)
+    for j, (d, c) in enumerate(cols):
+        m[np.searchsorted(days, d), j] = c
+    # Forward-Fill: pro Zelle der Index der letzten gültigen Zeile
+    rows = np.where(np.isnan(m), 0, np.arange(len(days))[:, None])
+    rows = np.maximum.accumulate(rows, axis=0) if len(days) else rows
+    m = np.take_along_axis(m, rows, axis=0)
+    # vorn abschneiden, bis jede Spalte einen Wert hat
+    complete = ~np.isnan(m).any(axis=1)
+    first = int(complete.argmax()) if complete.any() else len(days)
+    return days[first:], m[first:]
+
+
+def drawdowns(returns):
+    """Max Drawdown je Spalte (negativ, Anteil) aus Tagesrenditen [T, k]."""
+    wealth = np.cumprod(1.0 + returns, axis=0)
+    peak = np.maximum(np.maximum.accumulate(wealth, axis=0), 1.0)
+    return (wealth / peak - 1.0).min(axis=0, initial=0.0)
+
+
+def risk(returns, weights, bench):
+    """
+    Tagesrenditen [T, n], Gewichte [n], Benchmark [T] ->
+    {"portfolio": r [T], "volatility", "drawdown", "beta": [n + 1]} (letzte Spalte = Portfolio).
+    """
+    port = returns @ weights
+    cols = np.column_stack([returns, port])
+    vol = cols.std(axis=0, ddof=1) * math.sqrt(TRADING_DAYS)
+    b = bench - bench.mean()
+    var = float(b @ b)
+    beta = (cols - cols.mean(axis=0)).T @ b / var if var > 0 else np.full(cols.shape[1], np.nan)
+    return {"portfolio": port, "volatility": vol, "drawdown": drawdowns(cols), "beta": beta}
+
+
+def correlation(returns):
+    """Korrelationsmatrix der Spalten; konstante Spalten -> NaN."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.corrcoef(returns, rowvar=False).reshape(returns.shape[1], returns.shape[1])
+
+
+class Analytics:
+    """Ausgerichtete Matrix und Kennzahlen, gemerkt pro Eingangsstand."""
+
+    def __init__(self, benchmark: str = BENCHMARK):
+        self.benchmark = benchmark
+        self._matrix = None    # (schlüssel, tickers, days, closes)
+        self._result = None    # (schlüssel, ergebnis)
+        self._lock = threading.Lock()
+
+    def matrix(self, bars_by_ticker, tickers, today: date):
+        """(Serienstand, tickers mit Serie, days, closes); Benchmark ist die letzte Spalte."""
+        cols = [tk for tk in dict.fromkeys([*tickers, self.benchmark])
+                if _signature(bars_by_ticker.get(tk))]
+        key = (today.toordinal(), tuple((tk, _signature(bars_by_ticker[tk])) for tk in cols))
+        with self._lock:
+            if self._matrix is not None and self._matrix[0] == key:
+                return self._matrix
+        if self.benchmark in cols:
+            cols.remove(self.benchmark)
+            cols.append(self.benchmark)
+        days, closes = align(bars_by_ticker, cols, today)
+        value = (key, cols, days, closes)
+        with self._lock:
+            self._matrix = value
+        return value
+
+    def compute(self, bars_by_ticker, tickers, caps, today: date):
+        """
+        caps: {ticker: Market Cap in USD | None}. ->
+        {"tickers", "weights", "weighting", "days", "volatility", "drawdown",
+         "beta", "correlation"}; Kennzahlen-Arrays mit Portfolio als
+        letztem Eintrag. None ohne Benchmark oder mit weniger als drei gemeinsamen Tagen.
+        """
+        state, cols, days, closes = self.matrix(bars_by_ticker, tickers, today)
+        members = [tk for tk in cols if tk in tickers]
+        if self.benchmark not in cols or not members or len(days) < 3:
+            return None
+        idx = [cols.index(tk) for tk in members]
+        cap = [caps.get(tk) for tk in members]
+        if all(c is not None and c > 0 for c in cap):
+            weights, weighting = np.asarray(cap, dtype=np.float64), "marketCap"
+        else:
+            weights, weighting = np.ones(len(members)), "equal"
+        weights = weights / weights.sum()
+
+        key = (state, tuple(members), weights.tobytes())
+        with self._lock:
+            if self._result is not None and self._result[0] == key:
+                return self._result[1]
+        rets = closes[1:] / closes[:-1] - 1.0
+        out = risk(rets[:, idx], weights, rets[:, -1])
+        out.update({
+            "tickers": members, "weights": weights, "weighting": weighting,
+            "days": days, "correlation": correlation(rets[:, idx]),
+        })
+        with self._lock:
+            self._result = (key, out)
+        return out
+
+
+# Ein Rechenkern pro Prozess (Watchlist-Standardliste und eigene ?symbols=)
+portfolio = Analytics()
@@ -0,0 +1,62 @@
+# api/_lib/boot.py
+"""
+Cold-Start-Messung und einmalige, gemessene Imports.
+
+Schwere Module (yfinance, pandas, numpy) werden nur über timed_import
+geladen: einmal pro Prozess, mit Dauer in IMPORTS. Übersteigt die Summe
+das Budget (MARKET_IMPORT_BUDGET_MS), gibt es eine Warnung im Log.
+"""
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+
+from .telemetry import span
+
+log = logging.getLogger(__name__)
+
+STARTED_AT = time.time()
+_T0 = time.perf_counter()
+IMPORT_BUDGET_MS = float(os.environ.get("MARKET_IMPORT_BUDGET_MS", "1500"))
+# MARKET_SLIM=1: Kennzahlen ohne numpy (siehe metrics.py), kein pandas im Lesepfad
+SLIM = os.environ.get("MARKET_SLIM", "") == "1"
+
+IMPORTS = {}   # Modul -> ms
+MARKS = {}     # Name -> ms seit Prozessstart (z.B. "quotes ready")
+_lock = threading.Lock()
+
+
+def timed_import(name: str):
+    """Modul importieren und die Dauer beim ersten Mal festhalten."""
+    if name in sys.modules:
+        return sys.modules[name]
+    with _lock:
+        if name in sys.modules:
+            return sys.modules[name]
+        t = time.perf_counter()
+        with span("import"):
+            mod = importlib.import_module(name)
+        IMPORTS[name] = round((time.perf_counter() - t) * 1000, 1)
+        total = sum(IMPORTS.values())
+        if total > IMPORT_BUDGET_MS:
+            log.warning("import budget exceeded: %.0fms > %.0fms (%s)", total, IMPORT_BUDGET_MS, IMPORTS)
+        return mod
+
+
+def mark(name: str):
+    MARKS.setdefault(name, round((time.perf_counter() - _T0) * 1000, 1))
+
+
+def report() -> dict:
+    total = sum(IMPORTS.values())
+    return {
+        "processAgeSeconds": round(time.time() - STARTED_AT, 1),
+        "slim": SLIM,
+        "importsMs": dict(IMPORTS),
+        "importTotalMs": round(total, 1),
+        "importBudgetMs": IMPORT_BUDGET_MS,
+        "overBudget": total > IMPORT_BUDGET_MS,
+        "marksMs": dict(MARKS),
+    }
@@ -0,0 +1,94 @@
+# api/_lib/breaker.py
+"""
+Circuit Breaker pro Upstream (Yahoo chart / Yahoo meta).
+
+closed     normal; THRESHOLD Störungen in Folge -> open
+open       jeder Aufruf scheitert sofort mit CircuitOpen
+half_open  ein Hintergrund-Thread probiert nach COOLDOWN einen kleinen
+           Testabruf; klappt er -> closed, sonst wieder open (Cooldown
+           verdoppelt, max. COOLDOWN_MAX)
+
+User-Requests sind nie die Probe: solange nicht closed, warten sie auf
+nichts, sondern bekommen sofort den Fehler (bzw. den letzten guten Snapshot).
+"""
+import os
+import threading
+import time
+
+from .errors import UpstreamError
+from .telemetry import CIRCUIT_STATE, SCHEDULER
+
+THRESHOLD = int(os.environ.get("MARKET_BREAKER_THRESHOLD", "5"))
+COOLDOWN = float(os.environ.get("MARKET_BREAKER_COOLDOWN", "15"))
+COOLDOWN_MAX = 300.0
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpen(UpstreamError):
+    pass
+
+
+class Breaker:
+    def __init__(self, name: str, probe, threshold: int = THRESHOLD, cooldown: float = COOLDOWN):
+        self.name = name
+        self.probe = probe
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.failures = 0          # Störungen in Folge
+        self.opened_at = None
+        self._lock = threading.Lock()
+        CIRCUIT_STATE.set(0, upstream=name)
+
+    def check(self):
+        """Vor jedem Aufruf: CircuitOpen, wenn der Upstream als gestört gilt."""
+        if self.state != CLOSED:
+            SCHEDULER.inc(event="circuit_open")
+            raise CircuitOpen(f"{self.name} upstream unavailable (circuit {self.state})")
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state != CLOSED or self.failures < self.threshold:
+                return
+            self._set(OPEN)
+            self.opened_at = time.time()
+        threading.Thread(target=self._probe_loop, name=f"breaker-{self.name}", daemon=True).start()
+
+    def status(self) -> dict:
+        with self._lock:
+            out = {"state": self.state, "failures": self.failures}
+            if self.opened_at is not None and self.state != CLOSED:
+                out["openSeconds"] = round(time.time() - self.opened_at, 1)
+        return out
+
+    # ---------- intern ----------
+    def _set(self, state: str):
+        self.state = state
+        CIRCUIT_STATE.set(_STATE_VALUE[state], upstream=self.name)
+
+    def _probe_loop(self):
+        while True:
+            time.sleep(self.cooldown)
+            with self._lock:
+                self._set(HALF_OPEN)
+            try:
+                ok = bool(self.probe())
+            except Exception:
+                ok = False
+            with self._lock:
+                if ok:
+                    self._set(CLOSED)
+                    self.failures = 0
+                    self.cooldown = self.base_cooldown
+                    self.opened_at = None
+                    return
+                self._set(OPEN)
+                self.cooldown = min(COOLDOWN_MAX, self.cooldown * 2)
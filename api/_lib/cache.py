@@ -0,0 +1,204 @@
+# api/_lib/cache.py
+"""
+Prozessweiter Cache mit TTL + LRU-Verdrängung.
+
+Backends sind austauschbar:
+- MemoryBackend: OrderedDict im Prozess (schnell, weg bei Cold Start)
+- DiskBackend:   Pickle-Dateien unter /tmp (überlebt warme Serverless-Restarts)
+- ColumnBackend: mmap-Spalten für Close-Historien (columns.py)
+
+TTLCache fragt die Backends der Reihe nach ab und befördert Treffer
+aus langsameren Backends in die schnelleren.
+"""
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_DIR = os.environ.get("MARKET_CACHE_DIR", "/tmp/market-site-cache")
+HISTORY_TTL = float(os.environ.get("MARKET_HISTORY_TTL", "60"))
+
+
+class MemoryBackend:
+    """LRU im Speicher. Einträge: key -> (expires_at, value)."""
+
+    def __init__(self, max_items: int = 1024):
+        self.max_items = max_items
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            self._data.move_to_end(key)
+            return entry
+
+    def set(self, key, value, expires_at: float):
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_items:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class DiskBackend:
+    """
+    Pickle-Dateien unter /tmp. Schreiben atomar (tmp + os.replace),
+    LRU über mtime (wird bei jedem Treffer aktualisiert).
+    """
+
+    def __init__(self, root: str = CACHE_DIR, max_items: int = 4096):
+        self.root = root
+        self.max_items = max_items
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _path(self, key) -> str:
+        h = hashlib.sha1(repr(key).encode()).hexdigest()
+        return os.path.join(self.root, h + ".pkl")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                stored_key, expires_at, value = pickle.load(f)
+        except Exception:
+            return None
+        if stored_key != key:  # Hash-Kollision
+            return None
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return expires_at, value
+
+    def set(self, key, value, expires_at: float):
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            with open(tmp, "wb") as f:
+                pickle.dump((key, expires_at, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except Exception:
+            # /tmp voll oder nicht schreibbar -> Cache ist optional
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            self._writes += 1
+            check = self._writes % 64 == 0
+        if check:
+            self._evict()
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return
+        for n in names:
+            if n.endswith(".pkl"):
+                try:
+                    os.remove(os.path.join(self.root, n))
+                except OSError:
+                    pass
+
+    def _evict(self):
+        try:
+            entries = [e for e in os.scandir(self.root) if e.name.endswith(".pkl")]
+        except OSError:
+            return
+        if len(entries) <= self.max_items:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for e in entries[: len(entries) - self.max_items]:
+            try:
+                os.remove(e.path)
+            except OSError:
+                pass
+
+
+# Benannte Caches, z.B. für Trefferquoten auf /api/metrics
+CACHES = {}
+
+
+class TTLCache:
+    """TTL-Cache über eine Kette von Backends (schnellstes zuerst)."""
+
+    def __init__(self, ttl: float, backends=None, name: str | None = None):
+        self.ttl = ttl
+        self.backends = list(backends) if backends else [MemoryBackend()]
+        self.hits = 0
+        self.misses = 0
+        if name:
+            CACHES[name] = self
+
+    def get(self, key, default=None):
+        now = time.time()
+        for i, backend in enumerate(self.backends):
+            entry = backend.get(key)
+            if entry is None:
+                continue
+            expires_at, value = entry
+            if expires_at < now:
+                backend.delete(key)
+                continue
+            # Treffer in langsameren Backends nach vorne holen
+            for faster in self.backends[:i]:
+                faster.set(key, value, expires_at)
+            self.hits += 1
+            return value
+        self.misses += 1
+        return default
+
+    def set(self, key, value, ttl: float | None = None):
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        for backend in self.backends:
+            backend.set(key, value, expires_at)
+
+    def delete(self, key):
+        for backend in self.backends:
+            backend.delete(key)
+
+    def clear(self):
+        for backend in self.backends:
+            backend.clear()
+
+
+def make_backends(kind: str | None = None, subdir: str = "", disk=None):
+    """
+    Backend-Kette aus MARKET_CACHE_BACKEND: memory | disk | tiered (Default).
+    disk: Klasse des Disk-Backends (Default DiskBackend), bekommt das Verzeichnis.
+    """
+    disk = disk or DiskBackend
+    kind = (kind or os.environ.get("MARKET_CACHE_BACKEND", "tiered")).lower()
+    root = os.path.join(CACHE_DIR, subdir) if subdir else CACHE_DIR
+    if kind == "memory":
+        return [MemoryBackend()]
+    if kind == "disk":
+        return [disk(root)]
+    return [MemoryBackend(), disk(root)]
+
+
+def history_key(ticker: str, interval: str = "1d", rng: str = "1y"):
+    return (ticker.upper(), interval, rng)
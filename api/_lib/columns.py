@@ -0,0 +1,318 @@
+# api/_lib/columns.py
+"""
+Spaltenorientierter Disk-Store für Close-Historien (Backend für TTLCache).
+
+Pro Serie zwei Dateien mit festen 8-Byte-Zeilen:
+    <name>.<gen>.d   int64   Handelstage (date.toordinal)
+    <name>.<gen>.c   float64 Closes
+und ein gemeinsames Index-Log (index.log, eine JSON-Zeile + CRC pro Commit,
+die letzte Zeile je Key gilt). Gelesen wird per mmap: dates sind
+memoryviews direkt auf den Page Cache, ohne Kopie und ohne Parsen. closes
+kommen als Kopie (array, ein memcpy), weil der letzte Close in place
+aktualisiert wird und ein ausgegebener Stand sich sonst nachträglich ändert.
+
+Schreiben ist append-only und absturzsicher:
+1. neue Zeilen hinter die letzte committete Zeile schreiben,
+2. erst dann den Index-Eintrag (rows) anhängen.
+Ein Abbruch dazwischen hinterlässt nur Bytes hinter "rows", die niemand
+liest und der nächste Append überschreibt; halbe Index-Zeilen fallen
+über die CRC raus. Ausnahme: der Close des letzten (laufenden) Handelstags
+wird in place aktualisiert, ein einzelner ausgerichteter 8-Byte-Write.
+Passt eine neue Serie nicht an die gespeicherte (Split, Lücke), entsteht
+eine neue Generation und der Index zeigt danach um. Generationen werden nie
+wiederverwendet, auch nicht nach Löschen/Verdrängen (Zeitstempel in µs,
+mindestens Vorgänger + 1): ein anderer Prozess mit einer alten mmap kann
+sie so nicht mit einer neuen Datei gleichen Namens verwechseln.
+
+Vorne abgeschnittene Zeilen (start) werden bei Gelegenheit kompaktiert;
+über BUDGET_MB werden die am längsten nicht geladenen Serien verdrängt.
+"""
+import array
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import threading
+import time
+import zlib
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from .cache import CACHE_DIR
+
+BUDGET_MB = float(os.environ.get("MARKET_COLUMN_BUDGET_MB", "64"))
+ROW = 8
+INDEX = "index.log"
+LOG_COMPACT_BYTES = 1 << 20
+
+
+def _crc(line: bytes) -> str:
+    return f"{zlib.crc32(line):08x}"
+
+
+class ColumnBackend:
+    """
+    Backend-Schnittstelle wie Memory-/DiskBackend; Werte sind History-Einträge
+    {"bars": (dates, closes), "fetched": ts}.
+    """
+
+    def __init__(self, root: str = os.path.join(CACHE_DIR, "columns"),
+                 budget_mb: float = BUDGET_MB):
+        self.root = root
+        self.budget = int(budget_mb * 1024 * 1024)
+        self._index = {}        # repr(key) -> Record
+        self._log_pos = 0
+        self._log_ino = None
+        self._used = 0          # Bytes laut Index
+        self._maps = {}         # (name, gen, ext) -> mmap
+        self._lock = threading.RLock()
+
+    # ---------- Backend ----------
+    def get(self, key):
+        with self._lock:
+            self._sync()
+            rec = self._index.get(repr(key))
+            if rec is None:
+                return None
+            try:
+                dates = self._view(rec, "d", "q")
+                closes = _copy(self._view(rec, "c", "d"), "d")
+            except (OSError, ValueError):
+                return None
+        return rec["e"], {"bars": (dates, closes), "fetched": rec["f"]}
+
+    def set(self, key, value, expires_at: float):
+        dates, closes = value["bars"]
+        try:
+            with self._locked():
+                self._sync()
+                k = repr(key)
+                rec = self._index.get(k)
+                new = self._write(k, rec, dates, closes)
+                new.update(f=value["fetched"], e=expires_at)
+                self._commit(new)
+                if rec is not None and rec["g"] != new["g"]:
+                    self._unlink(rec)
+                self._enforce_budget()
+        except OSError:
+            pass  # /tmp voll oder nicht schreibbar -> Cache ist optional
+
+    def delete(self, key):
+        try:
+            with self._locked():
+                self._sync()
+                rec = self._index.get(repr(key))
+                if rec is not None:
+                    self._commit({"k": rec["k"], "del": True})
+                    self._unlink(rec)
+        except OSError:
+            pass
+
+    def clear(self):
+        with self._locked():
+            for n in os.listdir(self.root):
+                if n != ".lock":
+                    try:
+                        os.remove(os.path.join(self.root, n))
+                    except OSError:
+                        pass
+            self._index, self._log_pos, self._log_ino, self._used = {}, 0, None, 0
+            self._maps.clear()
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            self._sync()
+            return self._used
+
+    # ---------- Lesen ----------
+    def _path(self, rec, ext: str) -> str:
+        return os.path.join(self.root, f"{rec['n']}.{rec['g']}.{ext}")
+
+    def _view(self, rec, ext: str, fmt: str):
+        start, rows = rec["s"], rec["r"]
+        if rows <= start:
+            return []
+        mk = (rec["n"], rec["g"], ext)
+        mm = self._maps.get(mk)
+        if mm is None or len(mm) < rows * ROW:
+            with open(self._path(rec, ext), "rb") as f:
+                mm = mmap.mmap(f.fileno(), rows * ROW, access=mmap.ACCESS_READ)
+            self._maps[mk] = mm
+        return memoryview(mm).cast(fmt)[start:rows]
+
+    def _sync(self):
+        """Index-Log nachlesen (nur neue Zeilen; nach Kompaktierung komplett)."""
+        path = os.path.join(self.root, INDEX)
+        try:
+            st = os.stat(path)
+        except OSError:
+            self._index, self._log_pos, self._log_ino, self._used = {}, 0, None, 0
+            return
+        if st.st_ino != self._log_ino or st.st_size < self._log_pos:
+            self._index, self._log_pos, self._log_ino, self._used = {}, 0, st.st_ino, 0
+        if st.st_size == self._log_pos:
+            return
+        with open(path, "rb") as f:
+            f.seek(self._log_pos)
+            chunk = f.read(st.st_size - self._log_pos)
+        pos = 0
+        while True:
+            end = chunk.find(b"\n", pos)
+            if end < 0:
+                break  # halbe Zeile: noch nicht fertig geschrieben
+            line = chunk[pos:end]
+            pos = end + 1
+            body, _, crc = line.rpartition(b"\t")
+            if not body or _crc(body) != crc.decode(errors="replace"):
+                continue
+            rec = json.loads(body)
+            old = self._index.pop(rec["k"], None)
+            if old is not None:
+                self._used -= _nbytes(old)
+                if rec.get("del") or rec["g"] != old["g"]:
+                    self._drop_maps(old)   # Datei ist weg oder abgelöst
+            if not rec.get("del"):
+                self._index[rec["k"]] = rec
+                self._used += _nbytes(rec)
+        self._log_pos += pos
+
+    # ---------- Schreiben ----------
+    @contextmanager
+    def _locked(self):
+        """Thread-Lock + flock: auch andere Prozesse auf derselben /tmp schreiben hier."""
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            fd = os.open(os.path.join(self.root, ".lock"), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                yield
+            finally:
+                os.close(fd)   # gibt den flock mit frei
+
+    def _write(self, k: str, rec, dates, closes) -> dict:
+        """Serie schreiben -> neuer Record (noch nicht committet)."""
+        n = len(dates)
+        if rec is not None and n:
+            plan = self._append_plan(rec, dates, closes)
+            if plan is not None:
+                s, overlap = plan
+                rows = rec["r"]
+                with open(self._path(rec, "c"), "r+b") as fc, open(self._path(rec, "d"), "r+b") as fd:
+                    # laufender Handelstag: Close in place aktualisieren
+                    last = overlap - 1
+                    if last >= 0:
+                        os.pwrite(fc.fileno(), _pack("d", closes[last:last + 1]), (rows - 1) * ROW)
+                    if n > overlap:
+                        os.pwrite(fd.fileno(), _pack("q", dates[overlap:]), rows * ROW)
+                        os.pwrite(fc.fileno(), _pack("d", closes[overlap:]), rows * ROW)
+                new = dict(rec, s=s, r=rows + n - overlap)
+                # viele tote Zeilen vorne -> neu schreiben statt ewig mitschleppen
+                if new["s"] < max(256, new["r"] - new["s"]):
+                    return new
+        gen = _next_gen(rec)
+        name = rec["n"] if rec is not None else hashlib.sha1(k.encode()).hexdigest()[:16]
+        new = {"k": k, "n": name, "g": gen, "s": 0, "r": n}
+        for ext, fmt, seq in (("d", "q", dates), ("c", "d", closes)):
+            with open(self._path(new, ext), "wb") as f:
+                f.write(_pack(fmt, seq))
+        return new
+
+    def _append_plan(self, rec, dates, closes):
+        """
+        (start, overlap), wenn (dates, closes) die gespeicherte Serie nur
+        fortsetzt: gleiche Tage ab start, gleiche Closes bis auf den letzten
+        (laufenden) Tag. Sonst None -> neue Generation.
+        """
+        full = dict(rec, s=0)
+        stored = self._view(full, "d", "q")
+        rows = rec["r"]
+        s = bisect_left(stored, dates[0])
+        if s >= rows:
+            return None  # Lücke: neue Serie beginnt hinter der gespeicherten
+        overlap = rows - s
+        if len(dates) < overlap or stored[s:rows].tolist() != list(dates[:overlap]):
+            return None
+        if self._view(full, "c", "d")[s:rows - 1].tolist() != list(closes[:overlap - 1]):
+            return None  # rückwirkend angepasst (Split/Dividende)
+        return s, overlap
+
+    def _commit(self, rec: dict):
+        body = json.dumps(rec, separators=(",", ":")).encode()
+        line = body + b"\t" + _crc(body).encode() + b"\n"
+        path = os.path.join(self.root, INDEX)
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size > self._log_pos:
+                line = b"\n" + line   # halbe Zeile eines abgebrochenen Commits abschließen
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+        self._sync()
+        if os.path.getsize(path) > LOG_COMPACT_BYTES and \
+                os.path.getsize(path) > 4 * len(line) * max(1, len(self._index)):
+            self._compact_log()
+
+    def _compact_log(self):
+        path = os.path.join(self.root, INDEX)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            for rec in self._index.values():
+                body = json.dumps(rec, separators=(",", ":")).encode()
+                f.write(body + b"\t" + _crc(body).encode() + b"\n")
+        os.replace(tmp, path)
+        self._log_ino = None
+        self._sync()
+        # Dateien ohne Index-Eintrag (Abbruch vor dem Commit) aufräumen
+        live = {f"{r['n']}.{r['g']}.{ext}" for r in self._index.values() for ext in "dc"}
+        for n in os.listdir(self.root):
+            if n.endswith((".d", ".c")) and n not in live:
+                try:
+                    os.remove(os.path.join(self.root, n))
+                except OSError:
+                    pass
+
+    def _drop_maps(self, rec):
+        for ext in "dc":
+            self._maps.pop((rec["n"], rec["g"], ext), None)
+
+    def _unlink(self, rec):
+        self._drop_maps(rec)
+        for ext in "dc":
+            try:
+                os.remove(self._path(rec, ext))
+            except OSError:
+                pass
+
+    def _enforce_budget(self):
+        if self._used <= self.budget:
+            return
+        # am längsten nicht geladene Serien zuerst
+        for rec in sorted(self._index.values(), key=lambda r: r["f"]):
+            if self._used <= self.budget * 0.9:
+                break
+            self._commit({"k": rec["k"], "del": True})
+            self._unlink(rec)
+
+
+def _copy(view, fmt: str):
+    """memoryview -> eigenständiges array (ein memcpy)."""
+    out = array.array(fmt)
+    if len(view):
+        out.frombytes(view.cast("B"))
+    return out
+
+
+def _next_gen(rec) -> int:
+    """Neue Generation: eindeutig auch über Löschen hinweg (µs-Zeitstempel)."""
+    return max(time.time_ns() // 1000, (rec["g"] + 1) if rec is not None else 0)
+
+
+def _nbytes(rec) -> int:
+    return rec["r"] * ROW * 2
+
+
+def _pack(fmt: str, seq) -> bytes:
+    if isinstance(seq, (memoryview, array.array)):
+        return seq.tobytes()
+    return array.array(fmt, (int(x) if fmt == "q" else float(x) for x in seq)).tobytes()
@@ -0,0 +1,79 @@
+# api/_lib/concurrency.py
+"""
+Begrenzte Parallelität mit Timeouts für Upstream-Abrufe.
+
+run_bounded führt fn(key) für alle Keys in einem Threadpool aus und wartet
+höchstens bis zur Deadline. Was bis dahin fertig ist, kommt zurück; der Rest
+wird als Fehler markiert. Nachzügler laufen im Hintergrund aus, blockieren
+aber die Antwort nicht.
+"""
+import contextvars
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+DEFAULT_WORKERS = 8
+
+
+def deadline_in(seconds: float | None):
+    """Absolute Deadline (time.monotonic) oder None."""
+    return None if seconds is None else time.monotonic() + seconds
+
+
+def remaining(deadline: float | None):
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+def run_bounded(fn, keys, max_workers: int = DEFAULT_WORKERS,
+                timeout: float | None = None, deadline: float | None = None):
+    """
+    -> (results {key: value}, errors {key: str})
+    timeout:  Budget pro Key ab dessen Start (Wartezeit im Pool zählt nicht)
+    deadline: absolute Grenze (time.monotonic) für den ganzen Aufruf
+    """
+    keys = list(dict.fromkeys(keys))
+    results, errors = {}, {}
+    if not keys:
+        return results, errors
+
+    started = {}
+
+    def task(key):
+        started[key] = time.monotonic()
+        return fn(key)
+
+    ex = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(keys))))
+    try:
+        # Kontext mitgeben: Spans der Worker zählen zum aufrufenden Request
+        pending = {ex.submit(contextvars.copy_context().run, task, k): k for k in keys}
+        while pending:
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                break
+            # Keys, deren eigenes Budget abgelaufen ist, aufgeben
+            if timeout is not None:
+                for fut, k in list(pending.items()):
+                    t0 = started.get(k)
+                    if t0 is not None and now - t0 >= timeout and not fut.done():
+                        errors[k] = "timeout"
+                        fut.cancel()
+                        del pending[fut]
+                if not pending:
+                    break
+            waits = [remaining(deadline)]
+            if timeout is not None:
+                running = [started[k] + timeout - now for k in pending.values() if k in started]
+                waits.append(min(running) if running else timeout)
+            waits = [w for w in waits if w is not None]
+            done, _ = wait(list(pending), timeout=max(0.0, min(waits)) if waits else None,
+                           return_when=FIRST_COMPLETED)
+            for fut in done:
+                k = pending.pop(fut)
+                try:
+                    results[k] = fut.result()
+                except Exception as e:
+                    errors[k] = f"{type(e).__name__}: {e}"
+        for k in pending.values():
+            errors[k] = "timeout"
+    finally:
+        ex.shutdown(wait=False, cancel_futures=True)
+    return results, errors
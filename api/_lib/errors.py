@@ -0,0 +1,34 @@
+# api/_lib/errors.py
+"""
+Upstream-Fehler und ihre Einordnung.
+
+is_outage unterscheidet einen gestörten Upstream (Netzwerk, 5xx, Timeout,
+Rate-Limit) von Fehlern, die am Symbol liegen; nur Ersteres zählt für
+Backoff und Circuit Breaker.
+"""
+
+# yfinance-Fehler, die am Symbol liegen (unbekannt/delisted), nicht am Upstream
+DATA_ERRORS = ("PricesMissing", "TzMissing", "delisted", "InvalidPeriod", "No data found")
+
+
+class UpstreamError(RuntimeError):
+    """Upstream gestört (Netzwerk, 5xx, Timeout, Circuit offen)."""
+
+
+class UpstreamThrottled(UpstreamError):
+    """Yahoo (oder der lokale Rate-Limiter) lässt gerade keine Requests zu."""
+
+
+def is_throttle(exc: BaseException) -> bool:
+    if isinstance(exc, UpstreamThrottled) or type(exc).__name__ == "YFRateLimitError":
+        return True
+    text = str(exc)
+    return "Too Many Requests" in text or "Rate limited" in text
+
+
+def is_outage(exc: BaseException) -> bool:
+    """Fehler, die auf einen gestörten Upstream deuten (nicht: unbekanntes Symbol)."""
+    if isinstance(exc, (UpstreamError, TimeoutError, ConnectionError)) or is_throttle(exc):
+        return True
+    name = type(exc).__name__
+    return any(k in name for k in ("Timeout", "Connection", "Curl", "Requests", "SSL", "HTTPError"))
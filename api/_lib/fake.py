@@ -0,0 +1,290 @@
+# api/_lib/fake.py
+"""
+Lokaler Ersatz für Yahoo: gleiche Schnittstelle wie YahooProvider, aber
+ohne Netzwerk. Für Benchmarks und Offline-Entwicklung.
+
+Daten kommen aus einer Fixture (JSON, siehe record()) oder werden pro Ticker
+deterministisch erzeugt (Random Walk, Seed aus dem Ticker). Intraday-Bars
+(download_bars) sind ein Random Walk pro Session (13:30-20:00 UTC an
+Werktagen) ab dem Vortags-Close, bis zur aktuellen Uhrzeit. Fixture-Serien
+werden wochenweise auf das heutige Datum verschoben, damit MTD/YTD
+sinnvolle Fenster treffen.
+
+Latenz und Fehler sind einstellbar:
+- latency_ms + per_symbol_ms pro Aufruf, ± jitter_ms
+- fail_rate:     Anteil der Aufrufe, die mit FakeUpstreamError scheitern
+- throttle_rate: Anteil der Aufrufe, die mit UpstreamThrottled (429) scheitern
+- missing_rate:  Anteil der Ticker, die ein Batch-Download ohne Daten liefert
+
+Aktivieren mit MARKET_PROVIDER=fake (Konfiguration über MARKET_FAKE_*).
+calls zählt die Upstream-Aufrufe für die Auswertung.
+"""
+import bisect
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+
+from .concurrency import run_bounded
+from .errors import UpstreamError, UpstreamThrottled
+from .telemetry import UPSTREAM_CALLS
+
+SYNTH_DAYS = 800       # erzeugte Historie (reicht für 1y-Fenster + Delta)
+PERIOD_DAYS = {"5d": 7, "1mo": 31, "3mo": 92, "6mo": 183, "1y": 366, "2y": 731}
+META_WORKERS = 8
+SESSION_UTC = (13 * 3600 + 1800, 20 * 3600)   # Handelszeit in Sekunden ab Mitternacht UTC
+# grobe USD-Werte für erzeugte FX-Paare ("EURUSD=X")
+USD_VALUE = {"USD": 1.0, "EUR": 1.08, "GBP": 1.27, "CHF": 1.12, "JPY": 0.0067, "ZAR": 0.055,
+             "ILS": 0.27, "CAD": 0.73, "HKD": 0.128}
+INTERVAL_SECONDS = {"1m": 60, "2m": 120, "5m": 300, "15m": 900, "30m": 1800, "60m": 3600}
+
+
+class FakeUpstreamError(UpstreamError):
+    pass
+
+
+def last_weekday(d: date) -> date:
+    while d.weekday() >= 5:
+        d -= timedelta(days=1)
+    return d
+
+
+def synth_bars(tk: str, end: date, days: int = SYNTH_DAYS, seed: int = 0):
+    """Deterministischer Random Walk auf Werktagen bis einschließlich end."""
+    rnd = random.Random(zlib.crc32(tk.encode()) ^ seed)
+    price = rnd.uniform(10, 500)
+    mu, sigma = 0.0003, 0.015
+    src, dst = tk[:3], tk[3:6]
+    if tk.endswith("=X") and src in USD_VALUE and dst in USD_VALUE:
+        # FX-Paar: plausibler Kurs ohne Drift
+        price, mu, sigma = USD_VALUE[src] / USD_VALUE[dst], 0.0, 0.003
+    dates, closes = [], []
+    d = end - timedelta(days=days)
+    while d <= end:
+        if d.weekday() < 5:
+            price *= 1 + rnd.gauss(mu, sigma)
+            dates.append(d.toordinal())
+            closes.append(round(price, 4))
+        d += timedelta(days=1)
+    return dates, closes
+
+
+def load_fixture(path: str) -> dict:
+    """Fixture lesen: {"bars": {tk: {"dates": [iso], "closes": [...]}}, "meta": {tk: {...}}}."""
+    with open(path) as f:
+        raw = json.load(f)
+    bars = {}
+    for tk, s in raw.get("bars", {}).items():
+        dates = [date.fromisoformat(d).toordinal() for d in s["dates"]]
+        bars[tk] = (dates, [float(c) for c in s["closes"]])
+    return {"bars": bars, "meta": raw.get("meta", {})}
+
+
+def record(provider, tickers, path: str, period: str = "1y"):
+    """Aktuelle Daten über einen echten Provider holen und als Fixture speichern."""
+    tickers = list(tickers)
+    got = provider.download_closes(tickers, period=period)
+    meta = provider.fetch_meta(tickers, fundamentals=True)
+    out = {"recorded": date.today().isoformat(), "bars": {}, "meta": meta}
+    for tk, bars in got.items():
+        if bars:
+            dates, closes = bars
+            out["bars"][tk] = {"dates": [date.fromordinal(d).isoformat() for d in dates],
+                               "closes": closes}
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(out, f)
+    os.replace(tmp, path)
+    return len(out["bars"])
+
+
+class FakeProvider:
+    def __init__(self, fixture: str | None = None, latency_ms: float = 0.0,
+                 per_symbol_ms: float = 0.0, jitter_ms: float = 0.0, fail_rate: float = 0.0,
+                 missing_rate: float = 0.0, throttle_rate: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.per_symbol_ms = per_symbol_ms
+        self.jitter_ms = jitter_ms
+        self.fail_rate = fail_rate
+        self.missing_rate = missing_rate
+        self.throttle_rate = throttle_rate
+        self.seed = seed
+        self.calls = Counter()
+        self._fixture = load_fixture(fixture) if fixture else {"bars": {}, "meta": {}}
+        self._series = {}
+        self._sessions = {}   # (ticker, Tag, Intervall) -> Intraday-Spalten
+        self._rnd = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        env = os.environ.get
+        return cls(
+            fixture=env("MARKET_FAKE_FIXTURE") or None,
+            latency_ms=float(env("MARKET_FAKE_LATENCY_MS", "0")),
+            per_symbol_ms=float(env("MARKET_FAKE_PER_SYMBOL_MS", "0")),
+            jitter_ms=float(env("MARKET_FAKE_JITTER_MS", "0")),
+            fail_rate=float(env("MARKET_FAKE_FAIL_RATE", "0")),
+            missing_rate=float(env("MARKET_FAKE_MISSING_RATE", "0")),
+            throttle_rate=float(env("MARKET_FAKE_THROTTLE_RATE", "0")),
+            seed=int(env("MARKET_FAKE_SEED", "0")),
+        )
+
+    # ---------- Provider-Schnittstelle ----------
+    def download_closes(self, tickers, start: date | None = None, period: str | None = None,
+                        interval: str = "1d"):
+        tickers = list(tickers)
+        if not tickers:
+            return {}
+        self._upstream("download", len(tickers))
+        first = self._first_day(start, period)
+        out = {}
+        for tk in tickers:
+            out[tk] = None if self._chance(self.missing_rate) else self._slice(tk, first)
+        return out
+
+    def download_bars(self, tickers, interval: str = "5m", since: int | None = None):
+        tickers = list(tickers)
+        if not tickers:
+            return {}
+        self._upstream("intraday", len(tickers))
+        now = int(time.time())
+        out = {}
+        for tk in tickers:
+            out[tk] = None if self._chance(self.missing_rate) else self._intraday(tk, interval, since, now)
+        return out
+
+    def history_closes(self, tk: str, period: str = "1y", interval: str = "1d"):
+        self._upstream("history", 1)
+        return self._slice(tk, self._first_day(None, period))
+
+    def fetch_meta(self, tickers, fundamentals: bool = False, deadline: float | None = None):
+        tickers = list(tickers)
+        if not tickers:
+            return {}
+        results, _errors = run_bounded(
+            lambda tk: self.meta_one(tk, fundamentals), tickers,
+            max_workers=META_WORKERS, deadline=deadline,
+        )
+        return results
+
+    def meta_one(self, tk: str, fundamentals: bool = False):
+        from .meta import static_currency  # meta importiert provider -> erst zur Laufzeit
+
+        self._upstream("meta", 1)
+        meta = {"currency": "", "market_cap": None, "pe": None, "volume": None}
+        meta.update(self._fixture["meta"].get(tk) or {})
+        meta["currency"] = meta["currency"] or static_currency(tk) or "USD"
+        if fundamentals and meta["market_cap"] is None:
+            rnd = random.Random(zlib.crc32(tk.encode()) ^ self.seed)
+            meta["market_cap"] = round(rnd.uniform(1e9, 3e12), -6)
+            meta["pe"] = round(rnd.uniform(5, 60), 2)
+            meta["volume"] = round(rnd.uniform(1e5, 1e8))
+        if not fundamentals:
+            meta.update(market_cap=None, pe=None, volume=None)
+        return meta
+
+    # ---------- intern ----------
+    def _upstream(self, kind: str, symbols: int):
+        """Aufruf zählen, Latenz simulieren, ggf. Fehler werfen."""
+        UPSTREAM_CALLS.inc(kind=kind)
+        with self._lock:
+            self.calls[kind] += 1
+            self.calls["symbols"] += symbols
+            jitter = self._rnd.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+            fail = self._rnd.random() < self.fail_rate if self.fail_rate else False
+            throttle = self._rnd.random() < self.throttle_rate if self.throttle_rate else False
+        delay = self.latency_ms + self.per_symbol_ms * symbols + jitter
+        if delay > 0:
+            time.sleep(delay / 1000)
+        if throttle:
+            with self._lock:
+                self.calls["throttled"] += 1
+            raise UpstreamThrottled(f"injected {kind} rate limit")
+        if fail:
+            with self._lock:
+                self.calls["failed"] += 1
+            raise FakeUpstreamError(f"injected {kind} failure")
+
+    def _chance(self, rate: float) -> bool:
+        if not rate:
+            return False
+        with self._lock:
+            return self._rnd.random() < rate
+
+    def _first_day(self, start: date | None, period: str | None) -> int:
+        if start is not None:
+            return start.toordinal()
+        return (date.today() - timedelta(days=PERIOD_DAYS.get(period or "1y", 366))).toordinal()
+
+    def _series_for(self, tk: str):
+        end = last_weekday(date.today())
+        with self._lock:
+            hit = self._series.get(tk)
+        if hit is not None and hit[0] == end:
+            return hit[1]
+        recorded = self._fixture["bars"].get(tk)
+        if recorded:
+            dates, closes = recorded
+            # ganze Wochen verschieben: Wochentage bleiben Wochentage
+            shift = (end.toordinal() - dates[-1]) // 7 * 7
+            bars = ([d + shift for d in dates], closes)
+        else:
+            bars = synth_bars(tk, end, seed=self.seed)
+        with self._lock:
+            self._series[tk] = (end, bars)
+        return bars
+
+    def _slice(self, tk: str, first: int):
+        dates, closes = self._series_for(tk)
+        i = bisect.bisect_left(dates, first)
+        if i >= len(dates):
+            return None
+        return dates[i:], closes[i:]
+
+    def _intraday(self, tk: str, interval: str, since: int | None, now: int):
+        """Bars der laufenden (bzw. letzten) Session bis now; since filtert davor weg."""
+        day = datetime.fromtimestamp(now, timezone.utc).date()
+        while day.weekday() >= 5 or now < _epoch(day) + SESSION_UTC[0]:
+            day -= timedelta(days=1)
+        ts, days, highs, lows, closes, volumes = self._session(tk, day, interval)
+        lo = 0 if since is None else bisect.bisect_left(ts, since)
+        hi = bisect.bisect_right(ts, now)
+        if lo >= hi:
+            return None
+        return ts[lo:hi], days[lo:hi], highs[lo:hi], lows[lo:hi], closes[lo:hi], volumes[lo:hi]
+
+    def _session(self, tk: str, day: date, interval: str):
+        key = (tk, day, interval)
+        with self._lock:
+            hit = self._sessions.get(key)
+        if hit is not None:
+            return hit
+        dates, closes = self._series_for(tk)
+        i = bisect.bisect_left(dates, day.toordinal())
+        price = closes[i - 1] if i > 0 else 100.0
+        step = INTERVAL_SECONDS.get(interval, 300)
+        rnd = random.Random(zlib.crc32(f"{tk}:{day}:{interval}".encode()) ^ self.seed)
+        vol = 0.015 * (step / (SESSION_UTC[1] - SESSION_UTC[0])) ** 0.5
+        cols = ([], [], [], [], [], [])
+        t = _epoch(day) + SESSION_UTC[0]
+        while t < _epoch(day) + SESSION_UTC[1]:
+            o = price
+            price = round(price * (1 + rnd.gauss(0, vol)), 4)
+            wick = abs(rnd.gauss(0, vol / 2)) * price
+            for col, v in zip(cols, (t, day.toordinal(), round(max(o, price) + wick, 4),
+                                     round(min(o, price) - wick, 4), price,
+                                     float(rnd.randint(1_000, 50_000)))):
+                col.append(v)
+            t += step
+        with self._lock:
+            self._sessions[key] = cols
+        return cols
+
+
+def _epoch(d: date) -> int:
+    return int(datetime(d.year, d.month, d.day, tzinfo=timezone.utc).timestamp())
@@ -0,0 +1,140 @@
+# api/_lib/fx.py
+"""
+Umrechnung in eine Zielwährung (?ccy=EUR) über eine gecachte FX-Tabelle.
+
+Kurse kommen als Yahoo-Paare "<VON><NACH>=X" (letzter Tages-Close). Fehlende
+Paare werden gesammelt und in einem Batch-Download geholt, danach bis
+FX_TTL aus dem Cache bedient; ein Refresh-Zyklus kostet also höchstens
+einen FX-Abruf.
+
+Umgerechnet werden nur Preisfelder (PRICE_FIELDS) und Market Caps, für
+alle Items auf einmal (numpy, sonst Listen). Prozentänderungen bleiben in
+der Handelswährung. Index-Stände (^GSPC, ...) sind Punkte, keine Preise,
+und bleiben unverändert. Minor Units (GBp, ZAc, ILA) werden vorher auf die
+Hauptwährung gebracht.
+"""
+import os
+import re
+
+from .cache import TTLCache, make_backends
+from .metrics import np
+from .scheduler import scheduler as default_provider
+from .telemetry import span
+
+FX_TTL = float(os.environ.get("MARKET_FX_TTL", "60"))
+CCY_RE = re.compile(r"^[A-Z]{3}$")
+# Minor Units: Kürzel -> (Hauptwährung, Faktor)
+MINOR_UNITS = {"GBp": ("GBP", 0.01), "GBX": ("GBP", 0.01), "ZAc": ("ZAR", 0.01), "ILA": ("ILS", 0.01)}
+PRICE_FIELDS = ("value", "price", "high", "low", "vwap")
+CAP_FIELDS = ("marketCap",)
+
+
+def parse_ccy(raw: str | None):
+    """?ccy=eur -> "EUR"; None ohne Parameter; ValueError bei Unsinn."""
+    if not raw:
+        return None
+    ccy = raw.strip().upper()
+    if not CCY_RE.match(ccy):
+        raise ValueError(f"invalid currency: {raw.strip()[:10]!r}")
+    return ccy
+
+
+def pair(src: str, dst: str) -> str:
+    return f"{src}{dst}=X"
+
+
+class FxTable:
+    def __init__(self, provider=None, cache: TTLCache | None = None):
+        self.provider = provider or default_provider
+        self.cache = cache or TTLCache(ttl=FX_TTL, backends=make_backends(subdir="fx"), name="fx")
+
+    def rates(self, sources, target: str):
+        """{Währung: Kurs nach target | None}; fehlende Paare in einem Batch."""
+        out, missing = {}, []
+        for ccy in set(sources):
+            if ccy == target:
+                out[ccy] = 1.0
+                continue
+            rate = self.cache.get(pair(ccy, target))
+            if rate is None:
+                missing.append(ccy)
+            else:
+                out[ccy] = rate
+        if missing:
+            tickers = [pair(ccy, target) for ccy in missing]
+            try:
+                with span("fx"):
+                    got = self.provider.download_closes(tickers, period="5d")
+            except Exception:
+                got = {}
+            for ccy, tk in zip(missing, tickers):
+                bars = got.get(tk)
+                rate = float(bars[1][-1]) if bars and len(bars[1]) else None
+                if rate is not None and rate > 0:
+                    self.cache.set(tk, rate)
+                    out[ccy] = rate
+                else:
+                    out[ccy] = None  # nicht merken, nächster Zyklus versucht es erneut
+        return out
+
+
+def _factor(item: dict, rates: dict):
+    """Umrechnungsfaktor eines Items oder None (nicht umrechenbar)."""
+    ccy = item.get("currency") or ""
+    ccy, scale = MINOR_UNITS.get(ccy, (ccy, 1.0))
+    rate = rates.get(ccy)
+    return None if rate is None else rate * scale
+
+
+def _scale(values, factors, digits):
+    """values[i] * factors[i], gerundet; None bleibt None."""
+    if np is not None:
+        v = np.array([np.nan if x is None else x for x in values], dtype=np.float64)
+        out = np.round(v * factors, digits)
+        return [None if np.isnan(x) else float(x) for x in out]
+    return [None if x is None or f != f else round(x * f, digits) for x, f in zip(values, factors)]
+
+
+def convert_body(result, target: str, table: "FxTable | None" = None):
+    """(body, status) eines Builders -> Preise und Market Caps in target."""
+    body, status = result
+    items = body.get("items")
+    if status != 200 or not items:
+        return result
+    table = table or fx_table
+    sources = set()
+    for it in items:
+        ccy = it.get("currency") or ""
+        if ccy:
+            sources.add(MINOR_UNITS.get(ccy, (ccy, 1.0))[0])
+    rates = table.rates(sources, target)
+
+    # Faktoren pro Item; nicht umrechenbar (Index, unbekannte Währung, kein Kurs) -> 1.0
+    factors, converted = [], []
+    for it in items:
+        f = None if it.get("ticker", "").startswith("^") else _factor(it, rates)
+        converted.append(f is not None)
+        factors.append(1.0 if f is None else f)
+    if np is not None:
+        factors = np.array(factors, dtype=np.float64)
+
+    out = [dict(it) for it in items]
+    with span("fx"):
+        for field, digits in [(f, 2) for f in PRICE_FIELDS] + [(f, 0) for f in CAP_FIELDS]:
+            if not any(field in it for it in items):
+                continue
+            col = _scale([it.get(field) for it in items], factors, digits)
+            for it, v in zip(out, col):
+                if field in it:
+                    it[field] = v
+    for it, src, ok in zip(out, items, converted):
+        if ok:
+            it["currency"] = target
+            if src.get("currency") != target:
+                it["quoteCurrency"] = src.get("currency")
+        elif not it.get("ticker", "").startswith("^"):
+            it.setdefault("error", "fx_unavailable")
+    return {**body, "currency": target, "items": out}, status
+
+
+fx_table = FxTable()
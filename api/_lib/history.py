@@ -0,0 +1,170 @@
+# api/_lib/history.py
+"""
+Inkrementeller Store für tägliche Close-Historien.
+
+Pro Ticker liegt eine Serie (dates, closes) im Cache. Ist sie älter als
+HISTORY_TTL, wird nur ein kurzes Delta ab dem letzten gespeicherten Tag
+(minus ein paar Tage Überlappung) nachgeladen und angehängt.
+
+Voller Neuabruf (1 Jahr) nur, wenn
+- noch nichts gespeichert ist,
+- das Delta nicht an die gespeicherte Serie anschließt (Lücke), oder
+- sich überlappende Closes unterscheiden (Split/Dividende -> auto_adjust
+  hat die Historie rückwirkend verschoben).
+
+Auf Disk liegen die Serien spaltenweise (columns.py); aus dem Store kommen
+dates/closes daher als Sequenzen (Liste, memoryview bzw. array), nicht als list.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from datetime import date, timedelta
+
+from .cache import HISTORY_TTL, TTLCache, history_key, make_backends
+from .columns import ColumnBackend
+from .concurrency import run_bounded
+from .scheduler import scheduler as default_provider
+from .telemetry import span
+
+WINDOW_DAYS = 366          # 1 Jahr + 1 Tag (YTD im Januar)
+OVERLAP_DAYS = 7           # Überlappung fürs Delta (deckt WE/Feiertage ab)
+ADJUST_TOLERANCE = 1e-4    # relative Abweichung, ab der neu geladen wird
+STORE_TTL = float(os.environ.get("MARKET_STORE_TTL", str(7 * 24 * 3600)))
+
+
+class HistoryStore:
+    # provider: Scheduler-Schnittstelle (download_closes/history_closes mit deadline)
+    def __init__(self, provider=None, cache: TTLCache | None = None,
+                 fresh_ttl: float = HISTORY_TTL, window_days: int = WINDOW_DAYS):
+        self.provider = provider or default_provider
+        self.cache = cache or TTLCache(ttl=STORE_TTL, backends=make_backends(subdir="columns", disk=ColumnBackend),
+                                       name="history")
+        self.fresh_ttl = fresh_ttl
+        self.window_days = window_days
+        self._lock = threading.Lock()
+
+    # ---------- public ----------
+    def get_many(self, tickers, deadline: float | None = None, stale: set | None = None):
+        """
+        {ticker: (dates, closes) | None}. Lädt nur, was fehlt oder abgelaufen ist.
+        deadline (time.monotonic) begrenzt Batch, Delta und Einzelabruf-Fallbacks
+        (inkl. Warten auf Rate-Limit/Backoff im Scheduler).
+        stale: bekommt die Ticker, deren Delta gescheitert ist und die nur den
+        alten Stand (bis STORE_TTL alt) geliefert haben.
+        """
+        now = time.time()
+        out, full, delta = {}, [], {}
+        for tk in tickers:
+            entry = self.cache.get(self._key(tk))
+            if entry is None:
+                full.append(tk)
+            elif now - entry["fetched"] < self.fresh_ttl:
+                out[tk] = entry["bars"]
+            else:
+                delta[tk] = entry
+                out[tk] = entry["bars"]  # alter Stand, falls das Delta scheitert
+
+        if delta:
+            full.extend(self._fetch_delta(delta, out, stale, deadline))
+        if full:
+            self._fetch_full(full, out, deadline)
+        return {tk: out.get(tk) for tk in tickers}
+
+    def get(self, tk: str):
+        return self.get_many([tk])[tk]
+
+    def put(self, tk: str, bars):
+        with self._lock:
+            self.cache.set(self._key(tk), {"bars": self._trim(bars), "fetched": time.time()})
+
+    # ---------- intern ----------
+    def _key(self, tk: str):
+        return history_key(tk, "1d", "1y")
+
+    def _start_full(self) -> date:
+        return date.today() - timedelta(days=self.window_days)
+
+    def _trim(self, bars):
+        dates, closes = bars
+        cutoff = (self._start_full() - timedelta(days=OVERLAP_DAYS)).toordinal()
+        i = bisect_left(dates, cutoff)
+        return dates[i:], closes[i:]
+
+    def _fetch_full(self, tickers, out, deadline=None):
+        try:
+            with span("download"):
+                got = self.provider.download_closes(tickers, start=self._start_full(), deadline=deadline)
+        except Exception:
+            got = {}
+        # Fallback, wenn im Batch was fehlt -> Einzelabrufe, parallel
+        missing = [tk for tk in tickers if got.get(tk) is None]
+        if missing:
+            with span("history"):
+                singles, _errors = run_bounded(
+                    lambda tk: self.provider.history_closes(tk, period="1y", deadline=deadline), missing,
+                    deadline=deadline,
+                )
+            got = {**got, **singles}
+        for tk in tickers:
+            bars = got.get(tk)
+            if bars is not None:
+                self.put(tk, bars)
+                out[tk] = self._trim(bars)
+            else:
+                out.setdefault(tk, None)
+
+    def _fetch_delta(self, entries, out, stale=None, deadline=None):
+        """Delta laden + anhängen. Gibt Ticker zurück, die voll neu geladen werden müssen."""
+        last_min = min(e["bars"][0][-1] for e in entries.values())
+        start = date.fromordinal(last_min) - timedelta(days=OVERLAP_DAYS)
+        try:
+            with span("delta"):
+                got = self.provider.download_closes(list(entries), start=start, deadline=deadline)
+        except Exception:
+            # Upstream weg -> alten Stand behalten, aber als veraltet melden
+            if stale is not None:
+                stale.update(entries)
+            return []
+        refetch = []
+        for tk, entry in entries.items():
+            new = got.get(tk)
+            if new is None:
+                continue
+            merged = merge_bars(entry["bars"], new)
+            if merged is None:
+                refetch.append(tk)
+                continue
+            self.put(tk, merged)
+            out[tk] = self._trim(merged)
+        return refetch
+
+
+def merge_bars(old, new, tol: float = ADJUST_TOLERANCE):
+    """
+    Hängt new an old an. None, wenn ein Vollabruf nötig ist.
+
+    Der letzte gespeicherte Bar ist evtl. ein laufender Handelstag und darf
+    sich ändern; verglichen werden nur die abgeschlossenen Tage davor.
+    """
+    od, oc = old
+    nd, nc = new
+    if not nd:
+        return old
+    if not od:
+        return new
+    # Lücke: Delta beginnt nach dem letzten gespeicherten Tag
+    if nd[0] > od[-1]:
+        return None
+    stored = dict(zip(od[:-1], oc[:-1]))
+    for d, c in zip(nd, nc):
+        if d in stored:
+            base = stored[d]
+            if base == 0 or abs(c - base) / abs(base) > tol:
+                return None
+    # Gespeicherte Tage vor dem Delta behalten, Rest durch das Delta ersetzen
+    i = bisect_left(od, nd[0])
+    return list(od[:i]) + list(nd), list(oc[:i]) + list(nc)
+
+
+store = HistoryStore()
@@ -0,0 +1,185 @@
+# api/_lib/http.py
+"""
+Antworten schreiben: ETag/If-None-Match, Content-Encoding, vorkodierte Bodies.
+
+Der ETag ist der Content-Hash (bei Snapshots deren Version). Kodierte
+Varianten (gzip/br) werden pro Version einmal erzeugt und wiederverwendet,
+so kostet ein Poll eines offenen Tabs nur Lookup + 304 oder einen Write.
+
+prepare() ist framework-neutral (genutzt von JSONHandler und der
+ASGI-App in service.py); JSONHandler ist die gemeinsame Basis der
+BaseHTTPRequestHandler-Endpoints (CORS, OPTIONS, JSON senden).
+"""
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler
+
+try:
+    import brotli  # optional
+except ImportError:  # pragma: no cover
+    brotli = None
+
+ALLOWED_ORIGIN = "*"  # oder "http://localhost:3000"
+CORS_HEADERS = {
+    "Access-Control-Allow-Origin": ALLOWED_ORIGIN,
+    "Access-Control-Allow-Methods": "GET, OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type, If-None-Match, Last-Event-ID",
+}
+
+JSON_TYPE = "application/json"
+TEXT_TYPE = "text/plain; charset=utf-8"
+
+MIN_COMPRESS = 512      # kleinere Bodies lohnen die Kompression nicht
+ENCODED_MAX_ITEMS = 128
+
+_encoded = OrderedDict()
+_lock = threading.Lock()
+
+
+def content_version(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()[:16]
+
+
+def etag_for(version: str) -> str:
+    # weak: gleiche Repräsentation, egal welches Content-Encoding
+    return f'W/"{version}"'
+
+
+def not_modified(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == opaque:
+            return True
+    return False
+
+
+def negotiate(accept_encoding: str | None) -> str | None:
+    """Bestes unterstütztes Encoding aus Accept-Encoding (br > gzip), q=0 beachten."""
+    if not accept_encoding:
+        return None
+    offered = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        offered[token.strip().lower()] = q
+    for enc in ("br", "gzip"):
+        if enc == "br" and brotli is None:
+            continue
+        if offered.get(enc, offered.get("*", 0.0)) > 0:
+            return enc
+    return None
+
+
+def encode(data: bytes, version: str, encoding: str | None) -> bytes:
+    """Kodierter Body, pro (version, encoding) gecacht."""
+    if encoding is None or len(data) < MIN_COMPRESS:
+        return data
+    key = (version, encoding)
+    with _lock:
+        hit = _encoded.get(key)
+        if hit is not None:
+            _encoded.move_to_end(key)
+            return hit
+    if encoding == "br":
+        out = brotli.compress(data, quality=5)
+    else:
+        out = gzip.compress(data, compresslevel=6, mtime=0)
+    with _lock:
+        _encoded[key] = out
+        while len(_encoded) > ENCODED_MAX_ITEMS:
+            _encoded.popitem(last=False)
+    return out
+
+
+def prepare(data: bytes, status: int, cache: str | None = None, version: str | None = None,
+            if_none_match: str | None = None, accept_encoding: str | None = None,
+            content_type: str | None = None, timing: str | None = None):
+    """
+    -> (status, headers [(name, value)], body)
+    Passender If-None-Match -> 304 ohne Body. CORS-Header sind enthalten,
+    timing geht als Server-Timing raus.
+    """
+    version = version or content_version(data)
+    etag = etag_for(version)
+    headers = list(CORS_HEADERS.items())
+    headers += [("ETag", etag), ("Vary", "Accept-Encoding")]
+    if cache:
+        headers.append(("Cache-Control", cache))
+    if timing:
+        headers += [("Server-Timing", timing), ("Timing-Allow-Origin", ALLOWED_ORIGIN)]
+    if status == 200 and not_modified(if_none_match, etag):
+        return 304, headers, b""
+
+    encoding = negotiate(accept_encoding)
+    body = encode(data, version, encoding)
+    headers += [("Content-Type", content_type or JSON_TYPE), ("Content-Length", str(len(body)))]
+    if body is not data:
+        headers.append(("Content-Encoding", encoding))
+    return status, headers, body
+
+
+def send_bytes(h, data: bytes, status: int, cache: str | None = None,
+               version: str | None = None, content_type: str | None = None,
+               timing: str | None = None):
+    """Bytes über einen BaseHTTPRequestHandler senden (ETag/304, gzip/br, CORS)."""
+    status, headers, body = prepare(
+        data, status, cache=cache, version=version,
+        if_none_match=h.headers.get("If-None-Match"),
+        accept_encoding=h.headers.get("Accept-Encoding"),
+        content_type=content_type, timing=timing,
+    )
+    h.send_response(status)
+    for name, value in headers:
+        h.send_header(name, value)
+    h.end_headers()
+    if body:
+        h.wfile.write(body)
+
+
+def json_reply(body: dict, status: int = 200, cache: str | None = None) -> dict:
+    """Antwort-Dict, wie es die Routen liefern: {data, status, version, cache}."""
+    return {"data": json.dumps(body).encode(), "status": status, "version": None, "cache": cache}
+
+
+def text_reply(text: str, status: int = 200, cache: str | None = None,
+               content_type: str = TEXT_TYPE) -> dict:
+    return {"data": text.encode(), "status": status, "version": None, "cache": cache,
+            "content_type": content_type}
+
+
+class JSONHandler(BaseHTTPRequestHandler):
+    """Basis für die Vercel-Endpoints: CORS, OPTIONS, JSON/Reply senden."""
+
+    def _cors(self):
+        for name, value in CORS_HEADERS.items():
+            self.send_header(name, value)
+
+    def do_OPTIONS(self):
+        self.send_response(204)
+        self._cors()
+        self.end_headers()
+
+    def _send_json(self, body: dict, status: int, cache: str | None = None):
+        return send_bytes(self, json.dumps(body).encode(), status, cache=cache)
+
+    def _reply(self, reply: dict):
+        # ETag + 304, gzip/br pro Snapshot-Version nur einmal kodiert
+        return send_bytes(self, reply["data"], reply["status"],
+                          cache=reply.get("cache"), version=reply.get("version"),
+                          content_type=reply.get("content_type"), timing=reply.get("timing"))
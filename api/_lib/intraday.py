@@ -0,0 +1,235 @@
+# api/_lib/intraday.py
+"""
+Intraday-Modus für /api/quotes (?interval=1m|5m).
+
+Pro Ticker hält ein Tape die letzten WINDOW_BARS Bars im Speicher und führt
+die Kennzahlen der laufenden Session mit: letzter Kurs, High, Low und VWAP
+(Summe typischer Preis * Volumen / Summe Volumen). Neue Bars werden nur
+angehängt, O(1) pro Bar; aus der Historie wird nichts neu gerechnet.
+
+Der jüngste Bar ist meist noch offen und kommt beim nächsten Abruf erneut:
+er ersetzt dann seinen Vorgänger (dessen Volumen-Anteil wird abgezogen,
+High/Low können in einem Bar nur wachsen). Nachgeladen wird pro Ticker ab
+seinem eigenen jüngsten Bar (höchstens LOOKBACK zurück); Ticker, deren
+letzte Bars höchstens GROUP_SLACK auseinanderliegen, teilen sich einen
+Batch. Ein geschlossener Markt (DAX abends, Aktien am Wochenende neben
+Krypto) zieht so nicht bei jedem Refresh 24h Bars für alle nach. Kalte
+Ticker bekommen die letzte Session. Pro Intervall bleiben höchstens
+MAX_TAPES Tapes im Speicher (LRU über Abrufe und Lesezugriffe), eigene
+?symbols= lassen den Prozess so nicht unbegrenzt wachsen.
+
+1d und die Fenster (MTD, YTD, ...) beziehen sich auf Tages-Closes.
+Vortags-Closes kommen aus dem History-Store, die Fenster-Basen aus dem
+gemeinsamen Index (metrics.BaseIndex); beides einmal pro Kalendertag und
+Ticker (DailyBases).
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from datetime import date, datetime, timezone
+
+from .history import store as default_history
+from .metrics import DEFAULT_WINDOWS, boundaries, pct
+from .scheduler import scheduler as default_provider
+from .telemetry import span
+
+INTERVALS = ("1m", "5m")
+# Bars pro Tape: 24h in 1m (Krypto handelt durch)
+WINDOW_BARS = int(os.environ.get("MARKET_INTRADAY_WINDOW", "1440"))
+# Tapes pro Intervall; ein voller 1m-Tape sind grob 150 KB
+MAX_TAPES = int(os.environ.get("MARKET_INTRADAY_TAPES", "256"))
+LOOKBACK = 24 * 3600       # weiter zurück wird nie nachgeladen (Sekunden)
+GROUP_SLACK = 15 * 60      # max. Überlappung, um Ticker in einen Batch zu legen (Sekunden)
+PREV_DAYS = 5              # abgeschlossene Tages-Closes für den Vortags-Close
+
+
+class Tape:
+    """Rollendes Fenster eines Tickers plus laufende Session-Kennzahlen."""
+
+    __slots__ = ("bars", "day", "high", "low", "pv", "volume")
+
+    def __init__(self, maxlen: int = WINDOW_BARS):
+        self.bars = deque(maxlen=maxlen)   # (ts, high, low, close, volume)
+        self.day = None                    # Handelstag der laufenden Session
+        self.high = self.low = None
+        self.pv = self.volume = 0.0
+
+    def last_ts(self):
+        return self.bars[-1][0] if self.bars else None
+
+    def add(self, ts: int, day: int, high: float, low: float, close: float, volume: float):
+        if self.bars and ts < self.bars[-1][0]:
+            return  # schon verarbeitet
+        if day != self.day:
+            # neue Session: Kennzahlen zurücksetzen, das Fenster läuft weiter
+            self.day, self.high, self.low = day, high, low
+            self.pv = self.volume = 0.0
+        elif self.bars and ts == self.bars[-1][0]:
+            # offener Bar kommt erneut -> alten Stand herausrechnen
+            _, h, l, c, v = self.bars.pop()
+            self.pv -= (h + l + c) / 3 * v
+            self.volume -= v
+        self.high = max(self.high, high)
+        self.low = min(self.low, low)
+        self.pv += (high + low + close) / 3 * volume
+        self.volume += volume
+        self.bars.append((ts, high, low, close, volume))
+
+    def view(self):
+        """{"last", "ts", "day", "high", "low", "vwap"} oder None ohne Bars."""
+        if not self.bars:
+            return None
+        ts, _, _, close, _ = self.bars[-1]
+        return {
+            "last": close, "ts": ts, "day": self.day, "high": self.high, "low": self.low,
+            "vwap": self.pv / self.volume if self.volume > 0 else None,
+        }
+
+
+class IntradayBook:
+    """Tapes aller Ticker für ein Intervall."""
+
+    def __init__(self, interval: str, provider=None, window: int = WINDOW_BARS,
+                 max_tapes: int = MAX_TAPES):
+        self.interval = interval
+        self.provider = provider or default_provider
+        self.window = window
+        self.max_tapes = max_tapes
+        self.tapes = OrderedDict()   # LRU: zuletzt gelesen/aktualisiert am Ende
+        self._lock = threading.Lock()
+
+    def update(self, tickers, deadline: float | None = None, stale: set | None = None):
+        """
+        Neue Bars holen und anwenden. Gibt den ersten Upstream-Fehler zurück (oder None).
+        deadline (time.monotonic) begrenzt die Abrufe samt Warten im Scheduler;
+        stale bekommt die Ticker, deren Abruf gescheitert ist.
+        """
+        with self._lock:
+            last = {tk: self.tapes[tk].last_ts() for tk in tickers if tk in self.tapes}
+        warm = [tk for tk in tickers if last.get(tk) is not None]
+        cold = [tk for tk in tickers if last.get(tk) is None]
+        # pro Gruppe ab dem offenen Bar ihres ältesten Tickers, aber nicht ewig zurück
+        floor = int(time.time()) - LOOKBACK
+        calls = since_groups({tk: max(last[tk], floor) for tk in warm}, warm)
+        if cold:
+            calls.append((cold, None))
+        error = None
+        for tks, since in calls:
+            try:
+                with span("intraday"):
+                    got = self.provider.download_bars(tks, interval=self.interval, since=since,
+                                                      deadline=deadline)
+            except Exception as e:
+                error = error or e
+                if stale is not None:
+                    stale.update(tks)
+                continue
+            with self._lock:
+                for tk in tks:
+                    bars = got.get(tk)
+                    if not bars:
+                        continue
+                    tape = self.tapes.get(tk)
+                    if tape is None:
+                        tape = self.tapes[tk] = Tape(self.window)
+                    self.tapes.move_to_end(tk)
+                    for row in zip(*bars):
+                        tape.add(*row)
+                while len(self.tapes) > self.max_tapes:
+                    self.tapes.popitem(last=False)
+        return error
+
+    def views(self, tickers):
+        with self._lock:
+            out = {}
+            for tk in tickers:
+                tape = self.tapes.get(tk)
+                if tape is not None:
+                    self.tapes.move_to_end(tk)
+                out[tk] = tape.view() if tape is not None else None
+            return out
+
+
+def since_groups(last: dict, tickers, slack: int = GROUP_SLACK):
+    """
+    [(tickers, since)] nach letztem Bar sortiert; in einer Gruppe liegen die
+    letzten Bars höchstens slack auseinander, since ist der älteste davon.
+    """
+    groups = []
+    for tk in sorted(tickers, key=lambda t: last[t]):
+        if groups and last[tk] - groups[-1][1] <= slack:
+            groups[-1][0].append(tk)
+        else:
+            groups.append(([tk], last[tk]))
+    return groups
+
+
+class DailyBases:
+    """Vortags-Closes und Fenster-Basen pro Ticker, einmal pro Kalendertag."""
+
+    def __init__(self, history=None):
+        self.history = history or default_history
+        self._day = None
+        self._bases = {}
+        self._lock = threading.Lock()
+
+    def get(self, tickers, today: date | None = None):
+        """{ticker: {"prev": (dates, closes), <fenster>: Basis | None} | None}"""
+        today = today or date.today()
+        with self._lock:
+            if self._day != today:
+                self._day, self._bases = today, {}
+            missing = [tk for tk in tickers if tk not in self._bases]
+        if missing:
+            got = self.history.get_many(missing)
+            # Basen wie bei den Tages-Quotes (gemeinsamer Index, gleiche Konvention)
+            bases = boundaries.get(got, missing, today)
+            fresh = {}
+            for tk in missing:
+                bars = got.get(tk)
+                if not bars:
+                    continue  # nicht merken, beim nächsten Build neu versuchen
+                dates, closes = bars
+                k = bisect_left(dates, today.toordinal())   # nur abgeschlossene Tage
+                prev = (list(dates[max(k - PREV_DAYS, 0):k]), list(closes[max(k - PREV_DAYS, 0):k]))
+                fresh[tk] = {"prev": prev, **bases.get(tk, {})}
+            with self._lock:
+                if self._day == today:
+                    self._bases.update(fresh)
+        with self._lock:
+            return {tk: self._bases.get(tk) for tk in tickers}
+
+
+def quote_metrics(view, bases, windows=DEFAULT_WINDOWS):
+    """Tape-Stand + Tagesbasen -> {"value", "1d", <fenster>..., "high", "low", "vwap", "time"}."""
+    if view is None:
+        return None
+    out = {k: view[k] for k in ("high", "low", "vwap")}
+    out["value"] = view["last"]
+    out["time"] = datetime.fromtimestamp(view["ts"], timezone.utc).isoformat()
+    prev = None
+    if bases:
+        dates, closes = bases["prev"]
+        i = bisect_left(dates, view["day"])   # letzter Close vor dem Session-Tag
+        prev = closes[i - 1] if i > 0 else None
+    out["1d"] = pct(view["last"], prev)
+    for w in windows:
+        out[w] = pct(view["last"], (bases or {}).get(w))
+    return out
+
+
+_books = {}
+_books_lock = threading.Lock()
+
+
+def book(interval: str) -> IntradayBook:
+    with _books_lock:
+        b = _books.get(interval)
+        if b is None:
+            b = _books[interval] = IntradayBook(interval)
+        return b
+
+
+daily_bases = DailyBases()
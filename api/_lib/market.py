@@ -0,0 +1,335 @@
+# api/_lib/market.py
+"""
+Aufbau der Antworten für /api/quotes, /api/watchlist und /api/analytics.
+
+build_quotes / build_intraday_quotes / build_watchlist / build_analytics sind reine Builder:
+Symbolliste rein, (body, status) raus. Sie laufen im Request-Pfad oder im Refresher
+(siehe snapshot.py), der die Ergebnisse vorberechnet. Symbollisten sind die
+Standard-Dicts {name: ticker} oder (name, ticker)-Paare aus symbols.parse_symbols.
+"""
+import os
+from datetime import date
+
+from . import analytics
+from .concurrency import deadline_in, run_bounded
+from .fx import MINOR_UNITS, fx_table
+from .history import store
+from .intraday import book, daily_bases, quote_metrics
+from .meta import resolver, static_currency
+from .metrics import DEFAULT_WINDOWS, compute
+from .scheduler import scheduler
+from .symbols import symbol_pairs
+from .telemetry import span
+
+TICKERS = {
+    "S&P 500": "^GSPC",
+    "Nasdaq": "^IXIC",
+    "DAX": "^GDAXI",
+    "EuroStoxx50": "^STOXX50E",
+    "WTI Oil (US)": "CL=F",
+    "Brent Oil (EU)": "BZ=F",
+    "Gold": "GC=F",
+    "Kupfer": "HG=F",
+    "Silver": "SI=F",
+    "Platinum": "PL=F",
+    "Aluminium": "ALI=F",
+    "Bitcoin": "BTC-USD",
+    "Ethereum": "ETH-USD",
+    "VIX": "^VIX",
+}
+
+# ==== Watchlist ====
+WATCH = {
+    "Apple": "AAPL",
+    "Microsoft": "MSFT",
+    "NVIDIA": "NVDA",
+    "Amazon": "AMZN",
+    "Alphabet (Class A)": "GOOGL",
+    "Meta": "META",
+    "Tesla": "TSLA",
+    "Auto1 Group": "AG1.DE",  # EUR
+    "Airbus": "AIR.PA",       # EUR
+}
+
+# Gesamtbudget pro Aufbau (Watchlist, Quotes, Analytics; Vercel-Limit liegt bei 10s)
+DEADLINE_SECONDS = float(os.environ.get("MARKET_WATCHLIST_DEADLINE", "8"))
+STAGE_MARGIN = 0.25
+
+
+def _rounded(v):
+    return None if v is None else round(v, 2)
+
+
+def _stale_reply(stale):
+    """
+    Delta-Abruf gescheitert, der Store lieferte nur alte Serien. Kein 200:
+    sonst würde der Refresher den alten Stand als frischen Snapshot stempeln;
+    so bleibt der letzte gute Snapshot samt seinem Alter (staleSeconds) stehen.
+    """
+    return {"error": "upstream unavailable", "stale": sorted(stale)}, 503
+
+
+def build_quotes(symbols: dict = TICKERS, windows=DEFAULT_WINDOWS):
+    """{name: ticker} -> (body, status); windows: Fenster aus metrics.WINDOWS"""
+    # --- Daten laden: ein Jahr Tagesbars pro Ticker, alle Fenster daraus ---
+    # Inkrementeller Store: ein Batch für alles, Einzelabruf nur für Ticker,
+    # die im Batch fehlen; warm nur ein paar neue Bars statt 250+
+    symbols = symbol_pairs(symbols)
+    tickers = [tk for _, tk in symbols]
+    deadline = deadline_in(DEADLINE_SECONDS)
+    stale = set()
+    bars_1y = store.get_many(tickers, deadline=deadline - STAGE_MARGIN, stale=stale)
+    if not any(bars_1y.values()):
+        if scheduler.degraded():
+            return {"error": "upstream unavailable"}, 503
+        return {"error": "Download error: no data from upstream"}, 500
+    if stale:
+        return _stale_reply(stale)
+    # Währungen: statische Regeln + langer Cache, Netzwerk nur für Unbekannte
+    # und nur bis zur Deadline (fehlende bleiben "" und kommen beim nächsten Refresh)
+    currencies = resolver.currencies(tickers, deadline=deadline)
+
+    today = date.today()
+    # Basen aus dem Tagesindex (metrics.BaseIndex), pro Request nur Lookups
+    with span("compute"):
+        metrics = compute(bars_1y, tickers, today, windows)
+
+    items = []
+    for name, tk in symbols:
+        m = metrics[tk]
+        item = {
+            "name": name,
+            "ticker": tk,
+            "value": _rounded(m["value"]),
+            "delta1d": _rounded(m["1d"]),
+        }
+        item.update({w: _rounded(m[w]) for w in windows})
+        item["currency"] = currencies.get(tk, "")
+        items.append(item)
+
+    return {"asOf": str(today), "items": items}, 200
+
+
+def build_intraday_quotes(symbols: dict = TICKERS, interval: str = "5m", windows=DEFAULT_WINDOWS):
+    """{name: ticker} -> (body, status); Kurse aus Intraday-Bars (intraday.py)."""
+    symbols = symbol_pairs(symbols)
+    tickers = [tk for _, tk in symbols]
+    deadline = deadline_in(DEADLINE_SECONDS)
+    stale = set()
+    error = book(interval).update(tickers, deadline=deadline, stale=stale)
+    views = book(interval).views(tickers)
+    if not any(views.values()):
+        if error is not None or scheduler.degraded():
+            return {"error": "upstream unavailable"}, 503
+        return {"error": "Download error: no data from upstream"}, 500
+    if error is not None:
+        # Tapes haben nur den alten Stand: nicht als frischen Snapshot stempeln
+        return _stale_reply(stale)
+    # Tagesbasen einmal pro Tag, danach reine Dict-Lookups
+    bases = daily_bases.get(tickers)
+    currencies = resolver.currencies(tickers, deadline=deadline)
+
+    items = []
+    with span("compute"):
+        for name, tk in symbols:
+            m = quote_metrics(views[tk], bases.get(tk), windows) or {}
+            item = {
+                "name": name,
+                "ticker": tk,
+                "value": _rounded(m.get("value")),
+                "delta1d": _rounded(m.get("1d")),
+            }
+            item.update({w: _rounded(m.get(w)) for w in windows})
+            item.update({
+                "currency": currencies.get(tk, ""),
+                "high": _rounded(m.get("high")),
+                "low": _rounded(m.get("low")),
+                "vwap": _rounded(m.get("vwap")),
+                "time": m.get("time"),
+            })
+            items.append(item)
+
+    return {"asOf": str(date.today()), "interval": interval, "items": items}, 200
+
+
+def build_watchlist(symbols: dict = WATCH, windows=DEFAULT_WINDOWS):
+    """{name: ticker} -> (body, status); windows: Fenster aus metrics.WINDOWS"""
+    # History (ein Batch) und Fundamentals (parallel pro Symbol) gleichzeitig,
+    # mit gemeinsamer Deadline; was bis dahin fehlt, bekommt einen error-Marker
+    symbols = symbol_pairs(symbols)
+    tickers = [tk for _, tk in symbols]
+    deadline = deadline_in(DEADLINE_SECONDS)
+    # Stufen enden etwas früher, damit ihre Teilergebnisse noch ankommen
+    inner = deadline - STAGE_MARGIN
+    stale = set()
+    stages = {
+        "history": lambda: store.get_many(tickers, deadline=inner, stale=stale),
+        "fundamentals": lambda: resolver.fundamentals(tickers, deadline=inner),
+    }
+    done, _stage_errors = run_bounded(lambda k: stages[k](), stages, deadline=deadline)
+    if stale:
+        return _stale_reply(stale)
+    if "history" not in done:
+        # Deadline gerissen (langsamer Upstream, der Breaker merkt davon nichts):
+        # kein Snapshot aus lauter Leerzeilen, der letzte gute bleibt stehen
+        return {"error": "upstream timeout"}, 503
+    bars_1y = done["history"] or {}
+    fundamentals = done.get("fundamentals") or {}
+
+    today = date.today()
+    # Basen aus dem Tagesindex, gleiche Konvention wie /api/quotes
+    with span("compute"):
+        metrics = compute(bars_1y, tickers, today, windows)
+
+    items = []
+    for name, tk in symbols:
+        m = metrics[tk]
+        if m["n"] < 2:
+            item = {"name": name, "ticker": tk, "price": None, "delta1d": None}
+            item.update({w: None for w in windows})
+            item.update({
+                "currency": "", "marketCap": None, "pe": None, "volume": None,
+                "error": "no_series_or_too_short"
+            })
+            items.append(item)
+            continue
+
+        # Fundamentals/Currency (Cache, Netzwerk nur für unbekannte Symbole)
+        meta = fundamentals.get(tk)
+        market_cap = pe = volume = None
+        if meta:
+            market_cap = meta.get("market_cap")
+            pe = meta.get("pe")
+            volume = meta.get("volume")
+
+        item = {
+            "name": name,
+            "ticker": tk,
+            "price": round(m["value"], 2),
+            "delta1d": _rounded(m["1d"]),
+        }
+        item.update({w: _rounded(m[w]) for w in windows})
+        item.update({
+            "currency": (meta or {}).get("currency") or static_currency(tk),
+            "marketCap": None if market_cap is None else float(market_cap),
+            "pe": None if pe is None else float(pe),
+            "volume": None if volume is None else float(volume),
+        })
+        if meta is None:
+            item["error"] = "fundamentals_timeout"
+        items.append(item)
+
+    # Keine einzige Zeile: kein Snapshot, der den letzten guten ersetzt
+    if all(it["price"] is None for it in items):
+        return {"error": "upstream unavailable"}, 503
+    return {"asOf": str(today), "items": items}, 200
+
+
+def _usd_caps(tickers, fundamentals):
+    """{ticker: Market Cap in USD | None}; ein FX-Batch für alle Währungen."""
+    ccys = {}
+    for tk in tickers:
+        meta = fundamentals.get(tk) or {}
+        ccy = meta.get("currency") or static_currency(tk) or ""
+        ccys[tk] = MINOR_UNITS.get(ccy, (ccy, 1.0))
+    rates = fx_table.rates({c for c, _ in ccys.values() if c}, "USD")
+    out = {}
+    for tk in tickers:
+        cap = (fundamentals.get(tk) or {}).get("market_cap")
+        ccy, scale = ccys[tk]
+        rate = rates.get(ccy)
+        out[tk] = None if cap is None or rate is None else float(cap) * rate * scale
+    return out
+
+
+def build_analytics(symbols: dict = WATCH, windows=DEFAULT_WINDOWS):
+    """{name: ticker} -> (body, status); Portfolio-Kennzahlen (analytics.py), Benchmark ^GSPC."""
+    if analytics.np is None:
+        return {"error": "analytics unavailable in slim mode"}, 503
+    symbols = symbol_pairs(symbols)
+    tickers = [tk for _, tk in symbols]
+    deadline = deadline_in(DEADLINE_SECONDS)
+    inner = deadline - STAGE_MARGIN
+    # Benchmark im selben History-Batch wie die Watchlist
+    stale = set()
+    stages = {
+        "history": lambda: store.get_many([*tickers, analytics.BENCHMARK], deadline=inner, stale=stale),
+        "fundamentals": lambda: resolver.fundamentals(tickers, deadline=inner),
+    }
+    done, _stage_errors = run_bounded(lambda k: stages[k](), stages, deadline=deadline)
+    if stale:
+        return _stale_reply(stale)
+    if "history" not in done:
+        return {"error": "upstream timeout"}, 503
+    bars_1y = done["history"] or {}
+    caps = _usd_caps(tickers, done.get("fundamentals") or {})
+
+    today = date.today()
+    with span("compute"):
+        res = analytics.portfolio.compute(bars_1y, tickers, caps, today)
+        metrics = compute(bars_1y, tickers, today, windows) if res else {}
+    if res is None:
+        if scheduler.degraded():
+            return {"error": "upstream unavailable"}, 503
+        return {"error": "Download error: not enough history for analytics"}, 500
+
+    np = analytics.np
+    weights = dict(zip(res["tickers"], res["weights"]))
+    # Fensterrenditen: gewichtete Summe der Einzelrenditen (gleiche Basen wie die Watchlist)
+    portfolio = {}
+    for w in ("1d", *windows):
+        vals = [metrics[tk][w] for tk in res["tickers"]]
+        portfolio["delta1d" if w == "1d" else w] = (
+            None if any(v is None for v in vals) else _rounded(float(np.dot(res["weights"], vals))))
+    pct = lambda x: None if np.isnan(x) else round(float(x) * 100, 2)
+    ratio = lambda x, digits=3: None if np.isnan(x) else round(float(x), digits)
+    portfolio.update({
+        "volatility": pct(res["volatility"][-1]),
+        "maxDrawdown": pct(res["drawdown"][-1]),
+        "beta": ratio(res["beta"][-1]),
+    })
+
+    items = []
+    pos = {tk: i for i, tk in enumerate(res["tickers"])}
+    for name, tk in symbols:
+        i = pos.get(tk)
+        item = {"name": name, "ticker": tk}
+        if i is None:
+            item.update({"weight": None, "error": "no_series_or_too_short"})
+            items.append(item)
+            continue
+        m = metrics[tk]
+        item.update({"weight": ratio(weights[tk], 4), "delta1d": _rounded(m["1d"])})
+        item.update({w: _rounded(m[w]) for w in windows})
+        item.update({
+            "volatility": pct(res["volatility"][i]),
+            "maxDrawdown": pct(res["drawdown"][i]),
+            "beta": ratio(res["beta"][i]),
+        })
+        items.append(item)
+
+    days = res["days"]
+    return {
+        "asOf": str(today),
+        "benchmark": analytics.BENCHMARK,
+        "weighting": res["weighting"],
+        "range": {"from": str(date.fromordinal(int(days[0]))),
+                  "to": str(date.fromordinal(int(days[-1]))), "days": len(days)},
+        "portfolio": portfolio,
+        "items": items,
+        "correlation": {
+            "tickers": res["tickers"],
+            "matrix": [[ratio(x) for x in row] for row in res["correlation"]],
+        },
+    }, 200
+
+
+def snapshot_name(kind: str, symbols, default: dict, windows=DEFAULT_WINDOWS) -> str:
+    """
+    Snapshot-Schlüssel: Standardliste -> "quotes", sonst "quotes:AAPL,MSFT";
+    zusätzliche Fenster hängen hinten an: "quotes[qtd,1w]".
+    """
+    symbols = symbol_pairs(symbols)
+    name = kind if symbols == symbol_pairs(default) else f"{kind}:{','.join(tk for _, tk in symbols)}"
+    extra = [w for w in windows if w not in DEFAULT_WINDOWS]
+    return f"{name}[{','.join(extra)}]" if extra else name
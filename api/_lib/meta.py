@@ -0,0 +1,109 @@
+# api/_lib/meta.py
+"""
+Metadaten (Währung, Market Cap, P/E, Volumen) mit langem TTL-Cache.
+
+Währungen, die sich aus dem Ticker ableiten lassen (Rohstoffe/Krypto,
+Börsensuffixe, Futures), kosten gar keinen Request. Alles andere wird
+gesammelt und nur für die unbekannten Symbole nachgeladen.
+"""
+import os
+
+from .cache import TTLCache, make_backends
+from .fx import MINOR_UNITS
+from .scheduler import scheduler as default_provider
+from .telemetry import span
+
+CURRENCY_TTL = float(os.environ.get("MARKET_CURRENCY_TTL", str(7 * 24 * 3600)))
+FUNDAMENTALS_TTL = float(os.environ.get("MARKET_FUNDAMENTALS_TTL", "900"))
+
+# Rohstoffe/Krypto: USD
+USD_TICKERS = {"CL=F", "BZ=F", "GC=F", "SI=F", "PL=F", "HG=F", "ALI=F", "BTC-USD", "ETH-USD"}
+# Börsensuffixe; London, Johannesburg und Tel Aviv notieren in Minor Units
+# (Pence, Cent, Agorot), so wie Yahoo sie meldet (fx.MINOR_UNITS rechnet um)
+SUFFIX_CURRENCY = {
+    ".DE": "EUR", ".PA": "EUR", ".AS": "EUR", ".MI": "EUR", ".MC": "EUR",
+    ".L": "GBp", ".JO": "ZAc", ".TA": "ILA",
+    ".SW": "CHF",
+}
+
+
+def static_currency(tk: str) -> str:
+    """Währung ohne Netzwerk, "" wenn nicht ableitbar."""
+    if tk in USD_TICKERS:
+        return "USD"
+    for suffix, ccy in SUFFIX_CURRENCY.items():
+        if tk.endswith(suffix):
+            return ccy
+    # Futures default to USD
+    if tk.endswith("=F"):
+        return "USD"
+    return ""
+
+
+class MetaResolver:
+    def __init__(self, provider=None, cache: TTLCache | None = None):
+        self.provider = provider or default_provider
+        self.cache = cache or TTLCache(ttl=CURRENCY_TTL, backends=make_backends(subdir="meta"),
+                                       name="meta")
+
+    def currencies(self, tickers, deadline: float | None = None):
+        """
+        {ticker: currency}. Netzwerk nur für Symbole ohne statische Regel und ohne Cache;
+        was bis zur Deadline nicht kommt, bleibt "" (wird nicht gecacht).
+        """
+        out, unknown = {}, []
+        for tk in tickers:
+            ccy = static_currency(tk) or self.cache.get(("currency", tk))
+            if ccy is None:
+                unknown.append(tk)
+            else:
+                out[tk] = ccy
+        if unknown:
+            try:
+                with span("currency"):
+                    fetched = self.provider.fetch_meta(unknown, deadline=deadline)
+            except Exception:
+                fetched = {}
+            for tk in unknown:
+                if tk not in fetched:
+                    out[tk] = ""  # Abruf gescheitert (Timeout/Circuit) -> nicht merken
+                    continue
+                ccy = fetched[tk].get("currency") or ""
+                # Leere Antwort nur kurz merken, sonst fragt jeder Request erneut
+                self.cache.set(("currency", tk), ccy, None if ccy else FUNDAMENTALS_TTL)
+                out[tk] = ccy
+        return {tk: out.get(tk, "") for tk in tickers}
+
+    def fundamentals(self, tickers, deadline: float | None = None):
+        """
+        {ticker: {currency, market_cap, pe, volume} | None} mit kurzem TTL für die Kennzahlen.
+        None = bis zur Deadline nicht geladen (wird nicht gecacht).
+        """
+        out, unknown = {}, []
+        for tk in tickers:
+            meta = self.cache.get(("fundamentals", tk))
+            if meta is None:
+                unknown.append(tk)
+            else:
+                out[tk] = meta
+        if unknown:
+            try:
+                with span("fundamentals"):
+                    fetched = self.provider.fetch_meta(unknown, fundamentals=True, deadline=deadline)
+            except Exception:
+                fetched = {}
+            for tk in unknown:
+                if tk not in fetched:
+                    continue
+                meta = dict(fetched[tk])
+                reported = meta.get("currency") or ""
+                # Minor Units von Yahoo gehen vor: die Kurse sind dann in Pence & Co.
+                meta["currency"] = reported if reported in MINOR_UNITS else (static_currency(tk) or reported)
+                self.cache.set(("fundamentals", tk), meta, FUNDAMENTALS_TTL)
+                if meta["currency"]:
+                    self.cache.set(("currency", tk), meta["currency"])
+                out[tk] = meta
+        return {tk: out.get(tk) for tk in tickers}
+
+
+resolver = MetaResolver()
@@ -0,0 +1,207 @@
+# api/_lib/metrics.py
+"""
+Kennzahlen (Wert, 1d und Periodenrenditen) für /api/quotes und /api/watchlist.
+
+Fenster:
+- Periodengrenzen: mtd, qtd, ytd
+- rückwärts:       1w, 1m, 3m, 1y (7/30/91/365 Kalendertage)
+
+Basis-Konvention (für beide Endpoints gleich):
+    Basis = letzter Close VOR dem Fensterbeginn, also der Schlusskurs der
+    Vorperiode (mtd: letzter Handelstag des Vormonats; 1w: letzter Close am
+    oder vor heute-7). Beginnt die Serie später, gilt ihr erster Close.
+Damit ist mtd am ersten Handelstag des Monats gleich der 1d-Änderung.
+
+Die Basen hängen nur an abgeschlossenen Tagen vor dem Fensterbeginn und
+ändern sich höchstens einmal pro Tag. BaseIndex berechnet sie pro Ticker
+für alle Fenster auf einmal (vektorisiert mit numpy, sonst bisect) und
+merkt sie sich, bis ein neuer Tag oder ein anderer Serienstand kommt; pro
+Request bleibt ein Dict-Lookup je Ticker und Fenster.
+"""
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+
+from .boot import SLIM, timed_import
+
+np = None
+if not SLIM:
+    try:
+        np = timed_import("numpy")
+    except ImportError:
+        np = None
+
+PERIOD_WINDOWS = ("mtd", "qtd", "ytd")
+TRAILING_DAYS = {"1w": 7, "1m": 30, "3m": 91, "1y": 365}
+WINDOWS = PERIOD_WINDOWS + tuple(TRAILING_DAYS)
+DEFAULT_WINDOWS = ("mtd", "ytd")
+
+
+def base_days(today: date, windows=WINDOWS):
+    """Fenstername -> letzter Tag (ordinal), dessen Close als Basis zählt."""
+    out = {}
+    for w in windows:
+        if w == "mtd":
+            start = date(today.year, today.month, 1)
+        elif w == "qtd":
+            start = date(today.year, (today.month - 1) // 3 * 3 + 1, 1)
+        elif w == "ytd":
+            start = date(today.year, 1, 1)
+        elif w in TRAILING_DAYS:
+            start = today - timedelta(days=TRAILING_DAYS[w] - 1)
+        else:
+            continue
+        out[w] = start.toordinal() - 1
+    return out
+
+
+def base_close(dates, closes, day: int):
+    """Letzter Close am/vor day, vor Serienbeginn der erste; None ohne Daten."""
+    if not len(dates):
+        return None
+    return float(closes[max(bisect_right(dates, day) - 1, 0)])
+
+
+def pack(bars_by_ticker, tickers):
+    """
+    -> (dates int64 [n, m], closes float64 [n, m], lengths int64 [n])
+    Fehlende Ticker haben Länge 0. Padding: Datum = int64-Max, Close = NaN.
+    """
+    n = len(tickers)
+    lengths = np.zeros(n, dtype=np.int64)
+    for i, tk in enumerate(tickers):
+        bars = bars_by_ticker.get(tk)
+        if bars:
+            lengths[i] = len(bars[0])
+    m = int(lengths.max()) if n else 0
+    dates = np.full((n, m), np.iinfo(np.int64).max, dtype=np.int64)
+    closes = np.full((n, m), np.nan, dtype=np.float64)
+    for i, tk in enumerate(tickers):
+        k = lengths[i]
+        if k:
+            d, c = bars_by_ticker[tk]
+            dates[i, :k] = d
+            closes[i, :k] = c
+    return dates, closes, lengths
+
+
+def base_index(dates, lengths, day: int):
+    """
+    Index der Basis pro Zeile (-1 = keine Serie), vektorisiert über alle Zeilen.
+    Zeilen werden mit Versatz row*span hintereinandergelegt -> ein searchsorted.
+    """
+    n, m = dates.shape
+    if n == 0 or m == 0:
+        return np.full(n, -1, dtype=np.int64)
+    valid = np.arange(m)[None, :] < lengths[:, None]
+    lo = int(dates[valid].min()) if valid.any() else 0
+    hi = int(dates[valid].max()) if valid.any() else 0
+    span = hi - lo + 3                         # rel. Daten 1..span-2, Padding span-1
+    # Stichtag in [lo-1, hi] klemmen, nie auf Höhe des Paddings
+    cut = min(max(day, lo - 1), hi) - lo + 1
+    rel = np.where(valid, dates - lo + 1, span - 1)
+    rows = np.arange(n, dtype=np.int64)
+    flat = (rel + rows[:, None] * span).ravel()
+    pos = np.searchsorted(flat, rows * span + cut, side="right") - rows * m - 1
+    pos = np.maximum(pos, 0)
+    return np.where(lengths > 0, pos, -1)
+
+
+def base_closes(bars_by_ticker, tickers, today: date, windows=WINDOWS):
+    """{ticker: {fenster: Basis-Close | None}} für alle Ticker in einem Durchgang."""
+    days = base_days(today, windows)
+    if np is None:
+        out = {}
+        for tk in tickers:
+            dates, closes = bars_by_ticker.get(tk) or ([], [])
+            out[tk] = {w: base_close(dates, closes, day) for w, day in days.items()}
+        return out
+    dates, closes, lengths = pack(bars_by_ticker, tickers)
+    rows = np.arange(len(tickers))
+    cols = {}
+    for w, day in days.items():
+        idx = base_index(dates, lengths, day)
+        b = closes[rows, np.maximum(idx, 0)] if closes.size else np.full(len(tickers), np.nan)
+        cols[w] = np.where(idx >= 0, b, np.nan)
+    return {tk: {w: (None if np.isnan(v[i]) else float(v[i])) for w, v in cols.items()}
+            for i, tk in enumerate(tickers)}
+
+
+class BaseIndex:
+    """
+    Basis-Closes aller Fenster pro Ticker, gültig für einen Tag und Serienstand.
+    Neu berechnet wird nur, wenn sich der Tag, die Zahl abgeschlossener Bars,
+    deren erster/letzter Tag oder der erste Close (rückwirkende Anpassung)
+    ändern.
+    """
+
+    def __init__(self, windows=WINDOWS, max_items: int = 4096):
+        self.windows = tuple(windows)
+        self.max_items = max_items
+        self._entries = {}    # ticker -> (signatur, {fenster: basis})
+        self._lock = threading.Lock()
+
+    def get(self, bars_by_ticker, tickers, today: date):
+        """{ticker: {fenster: Basis | None}}; Ticker ohne Serie -> {}."""
+        out, missing, sigs = {}, [], {}
+        with self._lock:
+            for tk in tickers:
+                bars = bars_by_ticker.get(tk)
+                if not bars or not len(bars[0]):
+                    out[tk] = {}
+                    continue
+                dates, closes = bars
+                # nur abgeschlossene Tage zählen; der laufende Bar ändert keine Basis
+                k = bisect_left(dates, today.toordinal())
+                sig = (today.toordinal(), k, dates[0], dates[k - 1] if k else None, closes[0])
+                hit = self._entries.get(tk)
+                if hit is not None and hit[0] == sig:
+                    out[tk] = hit[1]
+                else:
+                    missing.append(tk)
+                    sigs[tk] = sig
+        if missing:
+            built = base_closes(bars_by_ticker, missing, today, self.windows)
+            with self._lock:
+                if len(self._entries) + len(built) > self.max_items:
+                    self._entries.clear()
+                for tk, bases in built.items():
+                    self._entries[tk] = (sigs[tk], bases)
+            out.update(built)
+        return out
+
+
+def pct(cur, base):
+    """Prozentänderung cur gegenüber base; None, wenn eins fehlt oder base 0 ist."""
+    if cur is None or base is None or base == 0:
+        return None
+    return (cur - base) / base * 100.0
+
+
+def compute(bars_by_ticker, tickers, today: date | None = None,
+            windows=DEFAULT_WINDOWS, index: BaseIndex | None = None):
+    """
+    {ticker: {"value", "1d", <fenster>..., "n"}} mit floats oder None.
+    "n" ist die Anzahl Bars der Serie.
+    """
+    tickers = list(tickers)
+    today = today or date.today()
+    bases = (index or boundaries).get(bars_by_ticker, tickers, today)
+    out = {}
+    for tk in tickers:
+        bars = bars_by_ticker.get(tk)
+        dates, closes = bars if bars else ([], [])
+        k = len(dates)
+        cur = float(closes[-1]) if k else None
+        row = {"value": cur, "1d": pct(cur, float(closes[-2]) if k > 1 else None)}
+        b = bases.get(tk) or {}
+        for w in windows:
+            if w != "1d":
+                row[w] = pct(cur, b.get(w))
+        row["n"] = k
+        out[tk] = row
+    return out
+
+
+# Ein Index pro Prozess, geteilt von quotes, watchlist und Intraday
+boundaries = BaseIndex()
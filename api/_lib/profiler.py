@@ -0,0 +1,69 @@
+# api/_lib/profiler.py
+"""
+Opt-in Sampling-Profiler für einzelne Requests.
+
+Nur aktiv mit MARKET_PROFILE=1; dann liefert ?profile=1 auf quotes/watchlist
+statt JSON die Stacks eines erzwungenen Snapshot-Neuaufbaus im
+"collapsed"-Format (flamegraph.pl, speedscope):
+
+    curl 'localhost:8000/api/quotes?profile=1' > quotes.folded
+
+Gesampelt werden der Request-Thread und alle Threads, die währenddessen
+neu starten (run_bounded-Worker); schon laufende Threads (Server-Loop,
+Refresher) bleiben außen vor.
+"""
+import os
+import sys
+import threading
+from collections import Counter
+
+ENABLED = os.environ.get("MARKET_PROFILE", "") == "1"
+INTERVAL = float(os.environ.get("MARKET_PROFILE_INTERVAL_MS", "5")) / 1000
+MAX_DEPTH = 64
+
+
+def requested(params: dict) -> bool:
+    return ENABLED and params.get("profile", ["0"])[0] == "1"
+
+
+def _collapse(frame) -> str:
+    names = []
+    while frame is not None and len(names) < MAX_DEPTH:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class Sampler:
+    def __init__(self, interval: float = INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._skip = set()
+
+    def __enter__(self):
+        me = threading.get_ident()
+        self._skip = {t.ident for t in threading.enumerate() if t.ident != me}
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for tid, frame in sys._current_frames().items():
+                if tid == own or tid in self._skip:
+                    continue
+                self.stacks[_collapse(frame)] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
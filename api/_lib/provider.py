@@ -0,0 +1,262 @@
+# api/_lib/provider.py
+"""
+Zugriff auf Yahoo Finance. Einzige Stelle, die yfinance anfasst.
+
+Close-Historien werden als "Bars" zurückgegeben: (dates, closes)
+- dates:  Liste von date.toordinal() (Handelstag in Börsen-Lokalzeit)
+- closes: Liste von floats
+
+Intraday-Bars (download_bars) sind Spalten-Tupel
+    (ts, days, highs, lows, closes, volumes)
+- ts:   Beginn des Bars, Unix-Sekunden (UTC)
+- days: Handelstag in Börsen-Lokalzeit (date.toordinal), trennt die Sessions
+"""
+import os
+import threading
+from datetime import date, datetime, timedelta, timezone
+
+from .boot import timed_import
+from .concurrency import run_bounded
+from .errors import DATA_ERRORS, UpstreamError, UpstreamThrottled, is_outage
+from .session import shared_session
+from .telemetry import UPSTREAM_CALLS, span
+
+TZ_CACHE_DIR = "/tmp/py-yfinance"
+META_WORKERS = 8
+# Timeout pro Upstream-Request (Sekunden)
+UPSTREAM_TIMEOUT = float(os.environ.get("MARKET_UPSTREAM_TIMEOUT", "5"))
+
+
+_yf_mod = None
+_yf_lock = threading.Lock()
+
+
+def _yf():
+    """yfinance einmal pro Prozess laden und konfigurieren."""
+    global _yf_mod
+    if _yf_mod is not None:
+        return _yf_mod
+    with _yf_lock:
+        if _yf_mod is None:
+            yf = timed_import("yfinance")
+            # yfinance Cachepfad in Serverless (schreibbar)
+            try:
+                try:
+                    from yfinance import set_tz_cache_location
+                except Exception:
+                    from yfinance.utils import set_tz_cache_location
+                set_tz_cache_location(TZ_CACHE_DIR)
+            except Exception:
+                pass
+            _yf_mod = yf
+    return _yf_mod
+
+
+def ensure_loaded():
+    """yfinance vorab laden (Warm-up über /api/ping?warm=1)."""
+    if isinstance(provider, YahooProvider):
+        _yf()
+
+
+def series_to_bars(s):
+    """pandas Close-Serie -> (dates, closes) oder None."""
+    if s is None:
+        return None
+    try:
+        s = s.dropna().astype(float)
+        if s.empty:
+            return None
+        idx = s.index
+        # tz-aware -> Börsen-Lokalzeit, tz-naiv (Tagesbars: Datum = Handelstag)
+        if getattr(idx, "tz", None) is not None:
+            idx = idx.tz_localize(None)
+        dates = [d.toordinal() for d in idx.date]
+        return dates, [float(x) for x in s.to_numpy()]
+    except Exception:
+        return None
+
+
+def frame_close_bars(df, tk: str):
+    # df kann MultiIndex (mehrere Ticker) oder single sein
+    if df is None:
+        return None
+    try:
+        pd = timed_import("pandas")
+        if isinstance(df.columns, pd.MultiIndex):
+            s = df[tk]["Close"]
+        else:
+            s = df["Close"]
+        return series_to_bars(s)
+    except Exception:
+        return None
+
+
+def frame_ohlcv_bars(df, tk: str):
+    """Intraday-Frame -> (ts, days, highs, lows, closes, volumes) oder None."""
+    if df is None:
+        return None
+    try:
+        pd = timed_import("pandas")
+        sub = df[tk] if isinstance(df.columns, pd.MultiIndex) else df
+        sub = sub.dropna(subset=["Close"])
+        if sub.empty:
+            return None
+        idx = sub.index
+        ts = [int(x) // 10**9 for x in idx.asi8]  # asi8: UTC-Nanosekunden, auch tz-aware
+        if getattr(idx, "tz", None) is not None:
+            idx = idx.tz_localize(None)
+        days = [d.toordinal() for d in idx.date]
+        close = sub["Close"].astype(float)
+        col = lambda name: [float(x) for x in sub[name].fillna(close).astype(float).to_numpy()]
+        volumes = [float(x) for x in sub["Volume"].fillna(0).astype(float).to_numpy()]
+        return ts, days, col("High"), col("Low"), [float(x) for x in close.to_numpy()], volumes
+    except Exception:
+        return None
+
+
+def _raise_download_errors(yf, tickers, what: str):
+    """yf.download schluckt Fehler pro Ticker; Störungen hier sichtbar machen."""
+    errors = getattr(getattr(yf, "shared", None), "_ERRORS", None) or {}
+    msgs = [str(errors.get(tk.upper(), "")) for tk in tickers]
+    if any("RateLimit" in m for m in msgs):
+        raise UpstreamThrottled(f"{what} rate limited")
+    failed = [m for m in msgs if m and not any(k in m for k in DATA_ERRORS)]
+    if failed:
+        raise UpstreamError(f"{what} failed: {failed[0][:200]}")
+
+
+class YahooProvider:
+    def download_closes(self, tickers, start: date | None = None, period: str | None = None,
+                        interval: str = "1d"):
+        """Batch-Download -> {ticker: bars | None}. Exceptions gehen an den Aufrufer."""
+        tickers = list(tickers)
+        if not tickers:
+            return {}
+        yf = _yf()
+        kwargs = dict(interval=interval, auto_adjust=True, group_by="ticker",
+                      threads=True, progress=False, timeout=UPSTREAM_TIMEOUT,
+                      session=shared_session())
+        if start is not None:
+            kwargs["start"] = start.isoformat()
+            kwargs["end"] = (date.today() + timedelta(days=1)).isoformat()
+        else:
+            kwargs["period"] = period or "1y"
+        UPSTREAM_CALLS.inc(kind="download")
+        df = yf.download(tickers=tickers, **kwargs)
+        with span("parse"):
+            out = {tk: frame_close_bars(df, tk) for tk in tickers}
+        if not any(out.values()):
+            _raise_download_errors(yf, tickers, "download")
+        return out
+
+    def download_bars(self, tickers, interval: str = "5m", since: int | None = None):
+        """
+        Intraday-Batch -> {ticker: intraday bars | None}. since (Unix-Sekunden):
+        nur Bars ab diesem Zeitpunkt, sonst die letzte Session (period=1d).
+        """
+        tickers = list(tickers)
+        if not tickers:
+            return {}
+        yf = _yf()
+        kwargs = dict(interval=interval, auto_adjust=False, prepost=False, group_by="ticker",
+                      threads=True, progress=False, timeout=UPSTREAM_TIMEOUT,
+                      session=shared_session())
+        if since is not None:
+            kwargs["start"] = datetime.fromtimestamp(since, timezone.utc)
+        else:
+            kwargs["period"] = "1d"
+        UPSTREAM_CALLS.inc(kind="intraday")
+        df = yf.download(tickers=tickers, **kwargs)
+        with span("parse"):
+            out = {tk: frame_ohlcv_bars(df, tk) for tk in tickers}
+        if not any(out.values()):
+            _raise_download_errors(yf, tickers, "intraday download")
+        return out
+
+    def history_closes(self, tk: str, period: str = "1y", interval: str = "1d"):
+        """Einzelabruf (robuster als Batch, aber ein Roundtrip pro Ticker)."""
+        yf = _yf()
+        t = yf.Ticker(tk, session=shared_session())
+        UPSTREAM_CALLS.inc(kind="history")
+        try:
+            h = t.history(period=period, interval=interval, auto_adjust=True,
+                          timeout=UPSTREAM_TIMEOUT, raise_errors=True)
+        except Exception as e:
+            if is_outage(e):
+                raise
+            return None  # Symbol ohne Daten
+        if h is None or h.empty or "Close" not in h.columns:
+            return None
+        return series_to_bars(h["Close"])
+
+    def fetch_meta(self, tickers, fundamentals: bool = False, deadline: float | None = None):
+        """
+        Metadaten für mehrere Ticker: {ticker: {currency, market_cap, pe, volume}}.
+        fast_info zuerst, info (teuer) nur wenn noch etwas fehlt. Parallel,
+        Ticker ohne Ergebnis bis Timeout/Deadline fehlen im Ergebnis.
+        """
+        tickers = list(tickers)
+        if not tickers:
+            return {}
+        results, _errors = run_bounded(
+            lambda tk: self.meta_one(tk, fundamentals), tickers,
+            max_workers=META_WORKERS, timeout=UPSTREAM_TIMEOUT * 2, deadline=deadline,
+        )
+        return results
+
+    def meta_one(self, tk: str, fundamentals: bool = False):
+        """Metadaten eines Tickers; Störungen (errors.is_outage) gehen an den Aufrufer."""
+        return _meta_one(_yf(), tk, fundamentals)
+
+
+def _meta_one(yf, tk: str, fundamentals: bool):
+    meta = {"currency": "", "market_cap": None, "pe": None, "volume": None}
+    t = yf.Ticker(tk, session=shared_session())
+    try:
+        UPSTREAM_CALLS.inc(kind="fast_info")
+        fi = getattr(t, "fast_info", None)
+        if fi:
+            def get_fi(key):
+                try:
+                    return getattr(fi, key) if not isinstance(fi, dict) else fi.get(key)
+                except Exception as e:
+                    if is_outage(e):
+                        raise
+                    return None
+            meta["currency"] = get_fi("currency") or ""
+            if fundamentals:
+                meta["market_cap"] = get_fi("market_cap")
+                meta["volume"] = get_fi("regular_market_volume") or get_fi("ten_day_average_volume")
+                meta["pe"] = get_fi("trailing_pe")
+    except Exception as e:
+        if is_outage(e):
+            raise
+    missing = not meta["currency"] or (
+        fundamentals and (meta["market_cap"] is None or meta["volume"] is None or meta["pe"] is None)
+    )
+    if missing:
+        try:
+            UPSTREAM_CALLS.inc(kind="info")
+            info = t.info or {}
+            meta["currency"] = meta["currency"] or info.get("currency", "") or ""
+            if fundamentals:
+                meta["market_cap"] = meta["market_cap"] or info.get("marketCap")
+                meta["volume"] = (meta["volume"] or info.get("volume") or info.get("averageVolume")
+                                  or info.get("averageDailyVolume10Day"))
+                meta["pe"] = meta["pe"] or info.get("trailingPE")
+        except Exception as e:
+            if is_outage(e):
+                raise
+    return meta
+
+
+def make_provider(kind: str | None = None):
+    """MARKET_PROVIDER: yahoo (Standard) | fake (lokaler Ersatz, siehe fake.py)."""
+    kind = (kind or os.environ.get("MARKET_PROVIDER", "yahoo")).lower()
+    if kind == "fake":
+        from .fake import FakeProvider
+        return FakeProvider.from_env()
+    return YahooProvider()
+
+
+provider = make_provider()
@@ -0,0 +1,140 @@
+# api/_lib/routes.py
+"""
+Routen-Logik, unabhängig vom Server.
+
+Jede Route nimmt den Request-Pfad (inkl. Query) und liefert ein Reply-Dict
+{data, status, version, cache[, content_type, timing]}. Die Vercel-Handler
+in api/*.py und die ASGI-App (service.py) schicken es nur noch raus.
+
+Routen laufen in einem Trace (telemetry.py): die Spans ihrer Stufen gehen
+als Server-Timing mit, Dauer und Status in die Metriken.
+"""
+import functools
+import time
+
+from . import boot, profiler, provider, telemetry
+from .cache import CACHES
+from .fx import convert_body, parse_ccy
+from .http import json_reply, text_reply
+from .intraday import INTERVALS
+from .market import (TICKERS, WATCH, build_analytics, build_intraday_quotes, build_quotes,
+                     build_watchlist, snapshot_name)
+from .metrics import DEFAULT_WINDOWS, WINDOWS
+from .scheduler import scheduler
+from .snapshot import refresher
+from .symbols import parse_symbols, parse_windows, query_params
+
+SNAPSHOT_CACHE = "s-maxage=60, stale-while-revalidate=300"
+# Notfall-Antwort (letzter guter Stand): CDN nur kurz, damit die Erholung schnell ankommt
+LAST_GOOD_CACHE = "s-maxage=15"
+
+
+def snapshot_reply(snap: dict) -> dict:
+    cache = None
+    if snap["status"] == 200:
+        cache = LAST_GOOD_CACHE if snap.get("stale") else SNAPSHOT_CACHE
+    return {
+        "data": snap["data"],
+        "status": snap["status"],
+        "version": snap["version"],
+        "cache": cache,
+    }
+
+
+def instrumented(route: str):
+    """Route in einem Trace ausführen; Spans -> Server-Timing, Dauer -> Metriken."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def run(path: str) -> dict:
+            with telemetry.trace(route) as tr:
+                reply = fn(path)
+            reply["timing"] = tr.server_timing()
+            telemetry.observe_request(route, reply["status"], tr.elapsed())
+            return reply
+        return run
+    return wrap
+
+
+def _snapshot_route(kind: str, path: str, default: dict, builder, fx: bool = True) -> dict:
+    # ?symbols=... überschreibt die Standardliste, ?windows=... ergänzt die Fenster,
+    # ?ccy=EUR rechnet Preise und Market Caps um (fx.py; nur mit fx=True)
+    params = query_params(path)
+    try:
+        symbols = parse_symbols(path, default)
+        windows = parse_windows(path, WINDOWS, DEFAULT_WINDOWS)
+        ccy = parse_ccy(params.get("ccy", [None])[0]) if fx else None
+    except ValueError as e:  # SymbolError, WindowError, ungültige Währung
+        return json_reply({"error": str(e)}, 400)
+    name = snapshot_name(kind, symbols, default, windows)
+    build = lambda: builder(symbols, windows)
+    if ccy:
+        name = f"{name}@{ccy}"
+        build = lambda: convert_body(builder(symbols, windows), ccy)
+    if profiler.requested(params):
+        # Neuaufbau erzwingen und dabei sampeln; Antwort sind die Stacks
+        with profiler.Sampler() as prof:
+            refresher.refresh(name, build)
+        return text_reply(prof.collapsed(), 200, cache="no-store")
+    # Antwort kommt als vorserialisierter Snapshot; gebaut wird nur, wenn keiner da ist
+    return snapshot_reply(refresher.get(name, build))
+
+
+@instrumented("quotes")
+def quotes(path: str) -> dict:
+    # ?interval=1m|5m -> Intraday-Modus, sonst Tages-Closes
+    interval = query_params(path).get("interval", ["1d"])[0]
+    if interval == "1d":
+        return _snapshot_route("quotes", path, TICKERS, build_quotes)
+    if interval not in INTERVALS:
+        return json_reply({"error": f"unsupported interval: {interval[:10]!r}"}, 400)
+    kind = f"quotes@{interval}"
+    builder = lambda symbols, windows=DEFAULT_WINDOWS: build_intraday_quotes(symbols, interval, windows)
+    # Standardliste im Refresher anmelden, die Tapes laufen dann auch ohne Requests mit
+    refresher.register(kind, lambda: builder(TICKERS))
+    return _snapshot_route(kind, path, TICKERS, builder)
+
+
+@instrumented("watchlist")
+def watchlist(path: str) -> dict:
+    return _snapshot_route("watchlist", path, WATCH, build_watchlist)
+
+
+@instrumented("analytics")
+def analytics(path: str) -> dict:
+    # Renditen, Risiko und Korrelation sind währungsneutral -> kein ?ccy=
+    return _snapshot_route("analytics", path, WATCH, build_analytics, fx=False)
+
+
+def warm_up() -> dict:
+    """Imports + Caches vorwärmen, Dauer pro Schritt in ms."""
+    steps = {}
+
+    def step(name, fn):
+        t = time.perf_counter()
+        try:
+            fn()
+            steps[name] = round((time.perf_counter() - t) * 1000, 1)
+        except Exception as e:
+            steps[name] = f"{type(e).__name__}: {e}"
+
+    step("yfinance", provider.ensure_loaded)
+    step("quotes", lambda: refresher.get("quotes", build_quotes))
+    step("watchlist", lambda: refresher.get("watchlist", build_watchlist))
+    return steps
+
+
+@instrumented("ping")
+def ping(path: str) -> dict:
+    # Health-Check; ?warm=1 lädt die schweren Imports und baut die Standard-Snapshots vor
+    out = {"ok": True}
+    if query_params(path).get("warm", ["0"])[0] == "1":
+        out["warm"] = warm_up()
+    out["upstream"] = scheduler.status()
+    out["startup"] = boot.report()
+    return json_reply(out, 200, cache="no-store")
+
+
+def metrics(path: str) -> dict:
+    """Prometheus-Textformat; Werte gelten pro Prozess/Instanz."""
+    telemetry.observe_caches(CACHES)
+    return text_reply(telemetry.render(), 200, cache="no-store", content_type=telemetry.CONTENT_TYPE)
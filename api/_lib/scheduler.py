@@ -0,0 +1,281 @@
+# api/_lib/scheduler.py
+"""
+Zentrale Ablaufsteuerung für alle Upstream-Aufrufe (gleiche Schnittstelle
+wie der Provider, History-Store und Meta-Resolver sprechen nur hiermit).
+
+- Dedupe:   läuft für (Ticker, Zeitraum) schon ein Abruf, wird auf dessen
+            Ergebnis gewartet statt neu zu fragen; Metadaten genauso pro Ticker.
+- Batching: Download-Wünsche mit gleichem Zeitraum, die innerhalb von
+            BATCH_WINDOW eintreffen, gehen als ein yf.download raus. Auch
+            Einzel-Historien (history_closes) landen erst im Batch; nur was
+            dort fehlt, wird einzeln nachgeladen.
+- Rate-Limit: Token-Bucket (RATE pro Sekunde, BURST), ein Token pro Aufruf.
+- Backoff:  meldet Yahoo "Too Many Requests", pausieren alle Aufrufe
+            exponentiell mit Jitter. Wer nicht so lange warten kann
+            (Deadline, MAX_WAIT), bekommt sofort UpstreamThrottled, statt auf
+            teurere Einzelabrufe auszuweichen. Die Deadline gilt für alle
+            Abrufe (Batch-Downloads, Einzel-Historien, Intraday, Metadaten),
+            auch fürs Warten auf einen fremden Batch.
+- Circuit:  pro Upstream (chart = Kurse, meta = fast_info/info) ein Breaker
+            (breaker.py); offen -> sofort CircuitOpen, Probe im Hintergrund.
+"""
+import os
+import random
+import threading
+import time
+
+from .breaker import CLOSED, Breaker
+from .concurrency import remaining, run_bounded
+from .errors import UpstreamThrottled, is_outage, is_throttle
+from .provider import UPSTREAM_TIMEOUT
+from .provider import provider as default_provider
+from .telemetry import SCHEDULER
+
+RATE = float(os.environ.get("MARKET_UPSTREAM_RATE", "20"))        # Aufrufe/s
+BURST = float(os.environ.get("MARKET_UPSTREAM_BURST", "40"))
+BATCH_WINDOW = float(os.environ.get("MARKET_BATCH_WINDOW_MS", "20")) / 1000
+MAX_BATCH = 200            # Ticker pro yf.download
+MAX_WAIT = UPSTREAM_TIMEOUT * 2   # längste Wartezeit auf Token/Backoff ohne Deadline
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+META_WORKERS = 8
+PROBE_TICKER = "^GSPC"
+
+
+class _Slot:
+    """Ergebnis eines laufenden Abrufs, auf das mehrere Aufrufer warten."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class UpstreamScheduler:
+    def __init__(self, provider=None, rate: float = RATE, burst: float = BURST,
+                 window: float = BATCH_WINDOW, max_batch: int = MAX_BATCH):
+        self.provider = provider or default_provider
+        self.rate = rate
+        self.burst = burst
+        self.window = window
+        self.max_batch = max_batch
+        self._tokens = burst
+        self._refilled = time.monotonic()
+        self._backoff_until = 0.0
+        self._strikes = 0
+        self._pending = {}    # Zeitraum -> {ticker: _Slot}, noch nicht abgeschickt
+        self._inflight = {}   # Key -> _Slot, abgeschickt oder wartend
+        self._lock = threading.Lock()
+        self.breakers = {
+            "chart": Breaker("chart", lambda: self.provider.download_closes(
+                [PROBE_TICKER], period="5d").get(PROBE_TICKER)),
+            "meta": Breaker("meta", lambda: self.provider.meta_one(PROBE_TICKER).get("currency")),
+        }
+
+    # ---------- Zustand ----------
+    def available(self, upstream: str = "chart") -> bool:
+        """False, solange der Circuit nicht geschlossen ist."""
+        return self.breakers[upstream].state == CLOSED
+
+    def degraded(self, upstream: str = "chart") -> bool:
+        """Circuit offen, der letzte Aufruf ist gescheitert oder ein Backoff läuft."""
+        b = self.breakers[upstream]
+        with self._lock:
+            backoff = time.monotonic() < self._backoff_until
+        return b.state != CLOSED or b.failures > 0 or backoff
+
+    def status(self) -> dict:
+        return {name: b.status() for name, b in self.breakers.items()}
+
+    # ---------- Provider-Schnittstelle ----------
+    def download_closes(self, tickers, start=None, period: str | None = None, interval: str = "1d",
+                        deadline: float | None = None):
+        rng = (start, None if start is not None else (period or "1y"), interval)
+        got, error = self._collect(list(tickers), rng, deadline)
+        if error is not None and not any(got.values()):
+            raise error
+        return got
+
+    def download_bars(self, tickers, interval: str = "5m", since: int | None = None,
+                      deadline: float | None = None):
+        """Intraday: ein Aufruf pro max_batch Ticker; gleiche Anfragen laufen nur einmal."""
+        tickers = list(tickers)
+        out = {}
+        for i in range(0, len(tickers), self.max_batch):
+            chunk = tuple(tickers[i:i + self.max_batch])
+            out.update(self._once(("bars", chunk, interval, since), lambda: self._call(
+                "chart", lambda: self.provider.download_bars(chunk, interval=interval, since=since),
+                deadline), deadline))
+        return out
+
+    def history_closes(self, tk: str, period: str = "1y", interval: str = "1d",
+                       deadline: float | None = None):
+        got, error = self._collect([tk], (None, period, interval), deadline)
+        if got.get(tk) is not None:
+            return got[tk]
+        if error is not None and is_outage(error):
+            raise error  # gedrosselt/gestört -> nicht auch noch einzeln fragen
+        # Im Batch gefehlt -> Einzelabruf (robuster), ebenfalls dedupliziert
+        return self._once(("history", tk, period, interval), lambda: self._call(
+            "chart", lambda: self.provider.history_closes(tk, period=period, interval=interval),
+            deadline), deadline)
+
+    def fetch_meta(self, tickers, fundamentals: bool = False, deadline: float | None = None):
+        tickers = list(tickers)
+        if not tickers:
+            return {}
+
+        def one(tk):
+            return self._once(("meta", tk, fundamentals), lambda: self._call(
+                "meta", lambda: self.provider.meta_one(tk, fundamentals), deadline), deadline)
+
+        results, _errors = run_bounded(one, tickers, max_workers=META_WORKERS,
+                                       timeout=UPSTREAM_TIMEOUT * 2, deadline=deadline)
+        return {tk: m for tk, m in results.items() if m is not None}
+
+    # ---------- Batching ----------
+    def _collect(self, tickers, rng, deadline: float | None = None):
+        """
+        Ticker für einen Zeitraum einsammeln -> ({ticker: bars | None}, erster Fehler).
+        Der Batch läuft unter der Deadline dessen, der ihn eröffnet hat; jeder
+        Aufrufer wartet höchstens bis zu seiner eigenen.
+        """
+        slots = {}
+        with self._lock:
+            batch = self._pending.get(rng)
+            leader = batch is None
+            if leader:
+                batch = self._pending[rng] = {}
+            for tk in tickers:
+                slot = self._inflight.get((tk, rng))
+                if slot is None:
+                    slot = self._inflight[(tk, rng)] = batch[tk] = _Slot()
+                else:
+                    SCHEDULER.inc(event="deduped")
+                slots[tk] = slot
+        if leader:
+            # Fenster offen lassen, damit parallele Requests mitfahren
+            if self.window > 0:
+                time.sleep(self.window)
+            with self._lock:
+                batch = self._pending.pop(rng)
+            self._flush(batch, rng, deadline)
+
+        out, error = {}, None
+        for tk, slot in slots.items():
+            wait = remaining(deadline)
+            if not slot.event.wait(MAX_WAIT + UPSTREAM_TIMEOUT if wait is None else wait):
+                out[tk] = None
+                continue
+            out[tk] = slot.result
+            if slot.error is not None and error is None:
+                error = slot.error
+        return out, error
+
+    def _flush(self, batch: dict, rng, deadline: float | None = None):
+        start, period, interval = rng
+        tickers = list(batch)
+        if len(tickers) > 1:
+            SCHEDULER.inc(len(tickers) - 1, event="batched")
+        for i in range(0, len(tickers), self.max_batch):
+            chunk = tickers[i:i + self.max_batch]
+            got, error = {}, None
+            try:
+                got = self._call("chart", lambda: self.provider.download_closes(
+                    chunk, start=start, period=period, interval=interval), deadline)
+            except Exception as e:
+                error = e
+            finally:
+                with self._lock:
+                    for tk in chunk:
+                        self._inflight.pop((tk, rng), None)
+                for tk in chunk:
+                    slot = batch[tk]
+                    slot.result = got.get(tk)
+                    slot.error = error
+                    slot.event.set()
+
+    # ---------- Single-Flight ----------
+    def _once(self, key, fn, deadline: float | None = None):
+        with self._lock:
+            slot = self._inflight.get(key)
+            leader = slot is None
+            if leader:
+                slot = self._inflight[key] = _Slot()
+        if not leader:
+            SCHEDULER.inc(event="deduped")
+            wait = remaining(deadline)
+            if not slot.event.wait(MAX_WAIT + UPSTREAM_TIMEOUT if wait is None else wait):
+                raise TimeoutError(f"waiting for {key[0]} {key[1]}")
+            if slot.error is not None:
+                raise slot.error
+            return slot.result
+        try:
+            slot.result = fn()
+            return slot.result
+        except Exception as e:
+            slot.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            slot.event.set()
+
+    # ---------- Rate-Limit / Backoff ----------
+    def _call(self, upstream: str, fn, deadline: float | None = None):
+        breaker = self.breakers[upstream]
+        breaker.check()
+        self._wait_turn(deadline)
+        try:
+            out = fn()
+        except Exception as e:
+            if is_throttle(e):
+                self._throttled()
+            if is_outage(e):
+                breaker.failure()
+            raise
+        breaker.success()
+        with self._lock:
+            self._strikes = 0
+        return out
+
+    def _wait_turn(self, deadline: float | None):
+        """Blockiert, bis Backoff vorbei und ein Token frei ist."""
+        limit = time.monotonic() + MAX_WAIT
+        if deadline is not None:
+            limit = min(limit, deadline)
+        waited = set()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._backoff_until:
+                    wait, event = self._backoff_until - now, "backoff_wait"
+                elif self.rate <= 0:
+                    return  # kein Limit konfiguriert
+                else:
+                    self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+                    self._refilled = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait, event = (1 - self._tokens) / self.rate, "rate_wait"
+            if now + wait > limit:
+                SCHEDULER.inc(event="rejected")
+                raise UpstreamThrottled("upstream busy, try again later")
+            if event not in waited:
+                waited.add(event)
+                SCHEDULER.inc(event=event)
+            time.sleep(wait)
+
+    def _throttled(self):
+        with self._lock:
+            self._strikes += 1
+            delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (self._strikes - 1))
+            # "equal jitter": mindestens die halbe Pause, Rest zufällig
+            delay = delay / 2 + random.uniform(0, delay / 2)
+            self._backoff_until = max(self._backoff_until, time.monotonic() + delay)
+            self._tokens = 0.0
+        SCHEDULER.inc(event="throttled")
+
+
+scheduler = UpstreamScheduler()
@@ -0,0 +1,115 @@
+# api/_lib/service.py
+"""
+Ein ASGI-Prozess für /api/quotes, /api/watchlist, /api/analytics, /api/ping,
+/api/metrics und /api/stream.
+
+Alle Routen teilen sich Caches, History-Store, Snapshots, Kennzahlen-Engine
+und die eine Yahoo-Session (session.py). Die Handler sind async: blockierende
+Arbeit (Snapshot-Build bei kaltem Cache) läuft im Threadpool, ein Worker
+bedient also viele gleichzeitige Polls und Streams.
+
+Lokal / auf einem eigenen Host:
+    uvicorn --app-dir api _lib.service:app --port 8000
+
+Die Vercel-Handler in api/*.py bleiben als dünne Adapter auf dieselben Routen.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from . import boot, routes
+from .http import CORS_HEADERS, json_reply, prepare
+from .market import build_analytics, build_quotes, build_watchlist
+from .snapshot import refresher
+from .stream import SERVICE_STREAM_SECONDS, StreamSession, full_events, parse_topics
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Standard-Snapshots für den Refresher-Thread anmelden (startet ihn auch)
+    refresher.register("quotes", build_quotes)
+    refresher.register("watchlist", build_watchlist)
+    refresher.register("analytics", build_analytics)
+    boot.mark("service")
+    yield
+
+
+app = FastAPI(title="market-site api", lifespan=lifespan, docs_url=None, redoc_url=None)
+
+
+def _path(request: Request) -> str:
+    q = request.url.query
+    return request.url.path + ("?" + q if q else "")
+
+
+def _respond(request: Request, reply: dict) -> Response:
+    status, headers, body = prepare(
+        reply["data"], reply["status"], cache=reply.get("cache"), version=reply.get("version"),
+        if_none_match=request.headers.get("if-none-match"),
+        accept_encoding=request.headers.get("accept-encoding"),
+        content_type=reply.get("content_type"), timing=reply.get("timing"),
+    )
+    # Content-Length setzt Starlette selbst
+    headers = {k: v for k, v in headers if k != "Content-Length"}
+    return Response(content=body, status_code=status, headers=headers)
+
+
+@app.options("/api/{rest:path}")
+async def options(rest: str):
+    return Response(status_code=204, headers=CORS_HEADERS)
+
+
+@app.get("/api/quotes")
+async def quotes(request: Request):
+    return _respond(request, await run_in_threadpool(routes.quotes, _path(request)))
+
+
+@app.get("/api/watchlist")
+async def watchlist(request: Request):
+    return _respond(request, await run_in_threadpool(routes.watchlist, _path(request)))
+
+
+@app.get("/api/analytics")
+async def analytics(request: Request):
+    return _respond(request, await run_in_threadpool(routes.analytics, _path(request)))
+
+
+@app.get("/api/ping")
+async def ping(request: Request):
+    return _respond(request, await run_in_threadpool(routes.ping, _path(request)))
+
+
+@app.get("/api/metrics")
+async def metrics(request: Request):
+    return _respond(request, routes.metrics(_path(request)))
+
+
+@app.get("/api/stream")
+async def stream(request: Request):
+    topics, error = parse_topics(_path(request))
+    if error:
+        return _respond(request, json_reply({"error": error}, 400))
+
+    async def events():
+        # Ablauf wie im Vercel-Handler (stream.StreamSession), gewartet wird auf eine
+        # asyncio.Queue statt in einem Thread pro Client
+        session = StreamSession(topics, SERVICE_STREAM_SECONDS, asyncio.get_running_loop())
+        try:
+            for event in await run_in_threadpool(session.opening):
+                yield event
+            while session.running():
+                if await request.is_disconnected():
+                    return
+                if session.take_resync():
+                    for event in await run_in_threadpool(full_events, topics):
+                        yield event
+                yield await session.next_event_async()
+            yield session.closing()
+        finally:
+            session.close()
+
+    headers = {**CORS_HEADERS, "Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(events(), media_type="text/event-stream", headers=headers)
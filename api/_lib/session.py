@@ -0,0 +1,27 @@
+# api/_lib/session.py
+"""
+Eine HTTP-Session pro Prozess für alle Yahoo-Requests.
+
+yfinance braucht eine curl_cffi-Session; die wird hier einmal angelegt und
+an jeden Aufruf durchgereicht. Verbindungen (Keep-Alive), Cookie und Crumb
+werden so von allen Routen geteilt, statt pro Endpoint neu aufgebaut.
+"""
+import threading
+
+_session = None
+_lock = threading.Lock()
+
+
+def shared_session():
+    """curl_cffi-Session oder None (dann nimmt yfinance seine eigene)."""
+    global _session
+    if _session is not None:
+        return _session
+    with _lock:
+        if _session is None:
+            try:
+                from curl_cffi import requests as curl_requests
+                _session = curl_requests.Session(impersonate="chrome")
+            except Exception:
+                return None
+    return _session
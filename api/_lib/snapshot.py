@@ -0,0 +1,189 @@
+# api/_lib/snapshot.py
+"""
+Vorberechnete Antworten ("Snapshots") für die GET-Endpoints.
+
+Ein Snapshot ist der fertig serialisierte JSON-Body plus Metadaten:
+    {"name", "version", "built_at", "status", "data": bytes}
+
+Refresher.get liefert
+- frisch (jünger als max_age):        direkt aus dem Store
+- abgelaufen (jünger als stale_ttl):  sofort den alten Stand, Neuaufbau im Hintergrund
+- fehlt / zu alt:                     blockierender Aufbau
+- Upstream gestört (Circuit offen) oder Aufbau gescheitert: den letzten guten
+  Stand (bis LAST_GOOD_TTL), markiert mit "stale": true und "staleSeconds"
+
+Aufbauten sind single-flight: gleichzeitige Anfragen für denselben Snapshot
+warten auf genau einen Build. Registrierte Snapshots werden zusätzlich
+periodisch in einem Hintergrund-Thread neu gebaut. Listener (subscribe)
+erfahren von jeder neuen Version, z.B. der SSE-Stream.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from .cache import TTLCache, make_backends
+from .scheduler import scheduler
+from .telemetry import SNAPSHOTS, span
+
+MAX_AGE = float(os.environ.get("MARKET_SNAPSHOT_MAX_AGE", "60"))
+STALE_TTL = float(os.environ.get("MARKET_SNAPSHOT_STALE_TTL", "300"))
+# So lange bleibt der letzte gute Stand als Notfall-Antwort erhalten
+LAST_GOOD_TTL = float(os.environ.get("MARKET_SNAPSHOT_LAST_GOOD_TTL", str(24 * 3600)))
+REFRESH_INTERVAL = float(os.environ.get("MARKET_REFRESH_INTERVAL", "60"))
+BUILD_WAIT = 15.0  # max. Wartezeit auf einen fremden Build
+
+
+def make_snapshot(name: str, body: dict, status: int) -> dict:
+    data = json.dumps(body).encode()
+    return {
+        "name": name,
+        "version": hashlib.sha1(data).hexdigest()[:16],
+        "built_at": time.time(),
+        "status": status,
+        "data": data,
+    }
+
+
+def stale_view(snap: dict) -> dict:
+    """Letzten guten Snapshot als veraltet markieren: "stale" + Alter vorn in den Body."""
+    age = int(time.time() - snap["built_at"])
+    head = f'{{"stale": true, "staleSeconds": {age}'.encode()
+    data = snap["data"]
+    data = head + (b", " + data[1:] if data[1:].strip() != b"}" else b"}")
+    return {**snap, "data": data, "version": hashlib.sha1(data).hexdigest()[:16], "stale": True}
+
+
+class _Flight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+
+
+class Refresher:
+    def __init__(self, store: TTLCache | None = None, max_age: float = MAX_AGE,
+                 stale_ttl: float = STALE_TTL, interval: float = REFRESH_INTERVAL,
+                 available=None):
+        # Store-TTL = LAST_GOOD_TTL: älter als stale_ttl wird nur noch im Notfall ausgeliefert
+        self.store = store or TTLCache(ttl=LAST_GOOD_TTL, backends=make_backends(subdir="snapshots"),
+                                       name="snapshots")
+        self.max_age = max_age
+        self.stale_ttl = stale_ttl
+        self.interval = interval
+        # available() -> False: Upstream gestört, nicht bauen, letzten guten Stand liefern
+        self.available = available or (lambda: True)
+        self._builders = {}
+        self._listeners = []
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    # ---------- public ----------
+    def register(self, name: str, builder):
+        """Snapshot für den periodischen Neuaufbau anmelden und den Thread starten."""
+        with self._lock:
+            self._builders[name] = builder
+        self.start()
+
+    def subscribe(self, fn):
+        """fn(name, snap) wird nach jedem Build mit neuer Version aufgerufen."""
+        with self._lock:
+            self._listeners.append(fn)
+
+    def get(self, name: str, builder) -> dict:
+        snap = self.store.get(name)
+        if snap is None:
+            SNAPSHOTS.inc(result="build")
+            return self.refresh(name, builder)
+        age = time.time() - snap["built_at"]
+        if age < self.max_age:
+            SNAPSHOTS.inc(result="fresh")
+            return snap
+        if not self.available():
+            # Circuit offen: niemand wartet auf einen toten Upstream
+            SNAPSHOTS.inc(result="last_good")
+            return stale_view(snap)
+        if age < self.stale_ttl:
+            # stale-while-revalidate: alten Stand liefern, im Hintergrund neu bauen
+            SNAPSHOTS.inc(result="stale")
+            self.refresh_async(name, builder)
+            return snap
+        SNAPSHOTS.inc(result="build")
+        new = self.refresh(name, builder)
+        if new["status"] == 200:
+            return new
+        SNAPSHOTS.inc(result="last_good")
+        return stale_view(snap)
+
+    def refresh(self, name: str, builder) -> dict:
+        """Snapshot (neu) bauen; läuft schon ein Build, auf dessen Ergebnis warten."""
+        with self._lock:
+            flight = self._inflight.get(name)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[name] = _Flight()
+        if not leader:
+            flight.event.wait(BUILD_WAIT)
+            return flight.result or self.store.get(name) or make_snapshot(
+                name, {"error": "snapshot build timeout"}, 503)
+        try:
+            try:
+                with span("build"):
+                    body, status = builder()
+            except Exception as e:
+                body, status = {"error": f"{type(e).__name__}: {e}"}, 500
+            with span("serialize"):
+                snap = make_snapshot(name, body, status)
+            if status == 200:
+                prev = self.store.get(name)
+                self.store.set(name, snap)
+                if prev is None or prev["version"] != snap["version"]:
+                    self._notify(name, snap)
+            flight.result = snap
+            return snap
+        finally:
+            with self._lock:
+                self._inflight.pop(name, None)
+            flight.event.set()
+
+    def refresh_async(self, name: str, builder):
+        with self._lock:
+            if name in self._inflight:
+                return
+        threading.Thread(target=self.refresh, args=(name, builder), daemon=True).start()
+
+    def start(self):
+        if self.interval <= 0:
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._loop, name="snapshot-refresher", daemon=True)
+            self._thread.start()
+
+    # ---------- intern ----------
+    def _notify(self, name: str, snap: dict):
+        with self._lock:
+            listeners = list(self._listeners)
+        for fn in listeners:
+            try:
+                fn(name, snap)
+            except Exception:
+                pass
+
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            if not self.available():
+                continue  # Circuit offen: die Probe des Breakers meldet die Erholung
+            with self._lock:
+                builders = list(self._builders.items())
+            for name, builder in builders:
+                try:
+                    self.refresh(name, builder)
+                except Exception:
+                    pass
+
+
+refresher = Refresher(available=lambda: scheduler.available("chart"))
@@ -0,0 +1,234 @@
+# api/_lib/stream.py
+"""
+Fan-out der Snapshot-Updates an SSE-Clients.
+
+Ein einziger Producer (der Refresher, siehe snapshot.py) baut die Snapshots;
+der Broadcaster hängt sich als Listener daran, berechnet pro neuer Version
+einmal das Delta (geänderte Items nach Ticker) und verteilt es an alle
+Client-Queues. N Clients kosten damit keinen einzigen Upstream-Request mehr.
+
+Events:
+    snapshot  {"topic", "version", "body"}                       beim Verbinden
+    delta     {"topic", "version", "asOf", "changed", "removed", "order"}
+
+Der Ablauf einer Verbindung (StreamSession: voller Stand, Resync, Heartbeat,
+Ende) ist für den Vercel-Handler (api/stream.py, ein Thread pro Client) und
+den ASGI-Dienst (service.py) derselbe. Im Dienst wartet jeder Client auf
+eine asyncio.Queue, die der Refresher-Thread über den Event-Loop füllt.
+"""
+import asyncio
+import json
+import os
+import queue
+import threading
+import time
+
+from .market import build_quotes, build_watchlist
+from .snapshot import refresher
+from .symbols import query_params
+
+QUEUE_SIZE = 32
+HEARTBEAT_SECONDS = 15
+HEARTBEAT = b": ping\n\n"
+# Serverless-Funktionen haben ein Zeitlimit (Vercel: 10s); EventSource verbindet danach neu.
+# Das Frontend nutzt den Stream nur mit dem ASGI-Dienst (NEXT_PUBLIC_MARKET_STREAM=1),
+# dort laufen Verbindungen länger (SERVICE_STREAM_SECONDS).
+MAX_STREAM_SECONDS = float(os.environ.get("MARKET_STREAM_MAX_SECONDS", "8"))
+SERVICE_STREAM_SECONDS = float(os.environ.get("MARKET_SERVICE_STREAM_SECONDS", "300"))
+
+TOPICS = {
+    "quotes": build_quotes,
+    "watchlist": build_watchlist,
+}
+
+
+def _items_by_ticker(body: dict):
+    return {it.get("ticker") or it.get("name"): it for it in body.get("items") or []}
+
+
+def diff_bodies(prev: dict | None, new: dict) -> dict:
+    """Delta zwischen zwei Bodies: geänderte/neue Items, entfernte Ticker, Reihenfolge."""
+    old = _items_by_ticker(prev or {})
+    cur = _items_by_ticker(new)
+    return {
+        "asOf": new.get("asOf"),
+        "changed": [it for tk, it in cur.items() if old.get(tk) != it],
+        "removed": [tk for tk in old if tk not in cur],
+        "order": list(cur),
+    }
+
+
+def format_event(event: str, payload: dict, event_id: str | None = None) -> bytes:
+    lines = []
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append("data: " + json.dumps(payload, separators=(",", ":")))
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+class Subscriber:
+    def __init__(self, topics, loop: asyncio.AbstractEventLoop | None = None):
+        self.topics = set(topics)
+        # mit Event-Loop (ASGI): asyncio.Queue, nur aus dem Loop-Thread anfassen
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE) if loop else queue.Queue(maxsize=QUEUE_SIZE)
+        # True -> Client ist zu langsam, bekommt beim nächsten Mal wieder den vollen Stand
+        self.resync = False
+
+    def offer(self, item):
+        """Event einreihen; wird aus dem Refresher-Thread aufgerufen."""
+        if self.loop is None:
+            self._put(item)
+            return
+        try:
+            self.loop.call_soon_threadsafe(self._put, item)
+        except RuntimeError:
+            pass  # Loop schon beendet, der Client ist weg
+
+    def _put(self, item):
+        try:
+            self.queue.put_nowait(item)
+        except (queue.Full, asyncio.QueueFull):
+            self.resync = True
+
+
+class Broadcaster:
+    def __init__(self, refresher):
+        self.refresher = refresher
+        self._subs = set()
+        self._bodies = {}   # topic -> (version, body), letzter verteilter Stand
+        self._lock = threading.Lock()
+        refresher.subscribe(self._on_snapshot)
+
+    def subscribe(self, topics, loop: asyncio.AbstractEventLoop | None = None) -> Subscriber:
+        sub = Subscriber(topics, loop)
+        with self._lock:
+            self._subs.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber):
+        with self._lock:
+            self._subs.discard(sub)
+
+    def client_count(self) -> int:
+        with self._lock:
+            return len(self._subs)
+
+    def snapshot_event(self, topic: str, snap: dict) -> bytes:
+        body = json.loads(snap["data"])
+        with self._lock:
+            if topic not in self._bodies:
+                self._bodies[topic] = (snap["version"], body)
+        return format_event("snapshot", {"topic": topic, "version": snap["version"], "body": body},
+                            snap["version"])
+
+    # Listener des Refreshers: einmal pro neuer Version, egal wie viele Clients.
+    # Der Refresher meldet alle Snapshots (auch "quotes:AAPL", "...@EUR"); nur
+    # Stream-Topics zählen, und geparst wird nur, wenn jemand zuhört.
+    def _on_snapshot(self, topic: str, snap: dict):
+        if topic not in TOPICS:
+            return
+        with self._lock:
+            if not any(topic in s.topics for s in self._subs):
+                # ohne Zuhörer kein Delta-Stand; der nächste Client startet mit dem vollen
+                self._bodies.pop(topic, None)
+                return
+            prev = self._bodies.get(topic)
+            if prev and prev[0] == snap["version"]:
+                return  # Stand wurde schon als Snapshot verschickt
+        body = json.loads(snap["data"])
+        with self._lock:
+            prev = self._bodies.get(topic)
+            if prev and prev[0] == snap["version"]:
+                return
+            self._bodies[topic] = (snap["version"], body)
+            subs = [s for s in self._subs if topic in s.topics]
+        delta = diff_bodies(prev[1] if prev else None, body)
+        event = format_event("delta", {"topic": topic, "version": snap["version"], **delta},
+                             snap["version"])
+        for sub in subs:
+            sub.offer((topic, event))
+
+
+def parse_topics(path: str):
+    """?topics=quotes,watchlist -> (topics, None) oder (None, Fehlertext)."""
+    raw = ",".join(query_params(path).get("topics", [])) or ",".join(TOPICS)
+    topics = [t.strip() for t in raw.split(",") if t.strip()]
+    unknown = [t for t in topics if t not in TOPICS]
+    if unknown or not topics:
+        return None, f"unknown topics: {unknown}"
+    return topics, None
+
+
+def full_events(topics):
+    """Voller Stand aller Topics als SSE-Events (baut fehlende Snapshots)."""
+    out = []
+    for topic in topics:
+        snap = refresher.get(topic, TOPICS[topic])
+        if snap["status"] == 200:
+            out.append(broadcaster.snapshot_event(topic, snap))
+        else:
+            out.append(format_event("error", {"topic": topic, "body": json.loads(snap["data"])}))
+    return out
+
+
+class StreamSession:
+    """
+    Eine SSE-Verbindung: anmelden, vollen Stand schicken, danach Deltas bzw.
+    Heartbeats bis max_seconds, dann "bye". Mit loop für den ASGI-Dienst.
+    """
+
+    def __init__(self, topics, max_seconds: float, loop: asyncio.AbstractEventLoop | None = None):
+        self.topics = topics
+        # Erst anmelden, dann den vollen Stand schicken -> kein Update geht verloren
+        self.sub = broadcaster.subscribe(topics, loop)
+        self.until = time.monotonic() + max_seconds
+
+    def opening(self):
+        """Erste Events (blockiert, wenn Snapshots fehlen)."""
+        return [b"retry: 5000\n\n", *full_events(self.topics)]
+
+    def running(self) -> bool:
+        return time.monotonic() < self.until
+
+    def take_resync(self) -> bool:
+        """Client war zu langsam: Queue leeren, Aufrufer schickt full_events(topics)."""
+        if not self.sub.resync:
+            return False
+        self.sub.resync = False
+        while not self.sub.queue.empty():
+            self.sub.queue.get_nowait()
+        return True
+
+    def _wait(self) -> float:
+        return min(HEARTBEAT_SECONDS, max(self.until - time.monotonic(), 0.01))
+
+    def next_event(self) -> bytes:
+        """Nächstes Delta oder ein Heartbeat (blockierend, Vercel-Handler)."""
+        try:
+            return self.sub.queue.get(timeout=self._wait())[1]
+        except queue.Empty:
+            return HEARTBEAT
+
+    async def next_event_async(self) -> bytes:
+        """Nächstes Delta oder ein Heartbeat (ASGI, ohne Polling)."""
+        try:
+            return (await asyncio.wait_for(self.sub.queue.get(), self._wait()))[1]
+        except asyncio.TimeoutError:
+            return HEARTBEAT
+
+    def closing(self) -> bytes:
+        return format_event("bye", {"reconnect": True})
+
+    def close(self):
+        broadcaster.unsubscribe(self.sub)
+
+
+def register_topics():
+    for name, builder in TOPICS.items():
+        refresher.register(name, builder)
+
+
+# Ein Broadcaster pro Prozess, alle Clients hängen an derselben Refresh-Schleife
+broadcaster = Broadcaster(refresher)
@@ -0,0 +1,71 @@
+# api/_lib/symbols.py
+"""
+?symbols=AAPL,MSFT,... und ?windows=qtd,1w,... aus dem Request-Pfad lesen
+und prüfen.
+
+Ohne Parameter gilt die Standardliste des Endpoints. Bekannte Ticker
+behalten ihren Anzeigenamen, unbekannte heißen wie der Ticker. Die Liste
+besteht aus (name, ticker)-Paaren, eindeutig ist nur der Ticker: "^GDAXI"
+und "DAX" heißen beide "DAX" und bleiben trotzdem zwei Einträge. Fenster
+kommen zu den Standardfenstern (mtd, ytd) hinzu.
+"""
+import os
+import re
+from urllib.parse import parse_qs, urlsplit
+
+MAX_SYMBOLS = int(os.environ.get("MARKET_MAX_SYMBOLS", "50"))
+# Yahoo-Ticker: Buchstaben/Ziffern plus ^ (Indizes), = (Futures/FX), . (Börse), - (Krypto)
+SYMBOL_RE = re.compile(r"^[A-Z0-9^][A-Z0-9^=.\-]{0,19}$")
+
+
+class SymbolError(ValueError):
+    pass
+
+
+class WindowError(ValueError):
+    pass
+
+
+def query_params(path: str):
+    return parse_qs(urlsplit(path).query)
+
+
+def symbol_pairs(symbols) -> list:
+    """{name: ticker} (Standardlisten) oder (name, ticker)-Paare -> Liste von Paaren."""
+    return list(symbols.items()) if isinstance(symbols, dict) else list(symbols)
+
+
+def parse_symbols(path: str, default: dict) -> list:
+    """-> [(name, ticker), ...], Ticker eindeutig. SymbolError bei ungültiger Eingabe."""
+    raw = query_params(path).get("symbols")
+    if not raw:
+        return symbol_pairs(default)
+    tickers = []
+    for part in ",".join(raw).split(","):
+        tk = part.strip().upper()
+        if not tk:
+            continue
+        if not SYMBOL_RE.match(tk):
+            raise SymbolError(f"invalid symbol: {part.strip()[:20]!r}")
+        if tk not in tickers:
+            tickers.append(tk)
+    if not tickers:
+        raise SymbolError("no symbols given")
+    if len(tickers) > MAX_SYMBOLS:
+        raise SymbolError(f"too many symbols: {len(tickers)} > {MAX_SYMBOLS}")
+    names = {tk: name for name, tk in default.items()}
+    return [(names.get(tk, tk), tk) for tk in tickers]
+
+
+def parse_windows(path: str, allowed, default) -> tuple:
+    """-> Standardfenster + angefragte, in dieser Reihenfolge. WindowError bei Unbekanntem."""
+    windows = list(default)
+    for part in ",".join(query_params(path).get("windows", [])).split(","):
+        w = part.strip().lower()
+        if not w:
+            continue
+        if w not in allowed:
+            raise WindowError(f"unknown window: {part.strip()[:10]!r} (allowed: {', '.join(allowed)})")
+        if w not in windows:
+            windows.append(w)
+    return tuple(windows)
@@ -0,0 +1,197 @@
+# api/_lib/telemetry.py
+"""
+Spans pro Request (Server-Timing) und prozessweite Metriken (Prometheus).
+
+    with span("download"):
+        ...
+
+misst eine Stufe und
+- zählt sie ins Histogramm market_stage_duration_seconds{stage=...},
+- hängt sie an den laufenden Request (trace()), falls es einen gibt.
+
+Der Request-Kontext ist eine ContextVar; run_bounded reicht ihn an seine
+Worker-Threads weiter, parallele Stufen landen also im selben Header.
+
+Metriken sind pro Prozess (auf Vercel: pro Instanz) und bewusst minimal:
+Counter, Gauge, Histogram, Textformat 0.0.4. Kein prometheus_client nötig.
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_registry = []   # in Registrierungsreihenfolge, für render()
+_current = contextvars.ContextVar("market_trace", default=None)
+
+
+def _label_str(key) -> str:
+    if not key:
+        return ""
+    inner = ",".join(f'{k}="{_escape(v)}"' for k, v in key)
+    return "{" + inner + "}"
+
+
+def _escape(v) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values = {}
+        with _lock:
+            _registry.append(self)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with _lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._samples(key, value))
+        return lines
+
+    def _samples(self, key, value):
+        return [f"{self.name}{_label_str(key)} {value:g}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(sorted(labels.items()))
+        with _lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with _lock:
+            self._values[key] = float(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets=LATENCY_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with _lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def _samples(self, key, value):
+        counts, total, n = value
+        out = []
+        for bound, c in zip(self.buckets, counts):
+            out.append(f"{self.name}_bucket{_label_str(key + (('le', f'{bound:g}'),))} {c}")
+        out.append(f"{self.name}_bucket{_label_str(key + (('le', '+Inf'),))} {n}")
+        out.append(f"{self.name}_sum{_label_str(key)} {total:.6f}")
+        out.append(f"{self.name}_count{_label_str(key)} {n}")
+        return out
+
+
+def render() -> str:
+    with _lock:
+        metrics = list(_registry)
+    lines = []
+    for m in metrics:
+        lines.extend(m.render())
+    return "\n".join(lines) + "\n"
+
+
+# ---------- Metriken ----------
+STAGE_SECONDS = Histogram("market_stage_duration_seconds", "Dauer einzelner Stufen (span)")
+REQUEST_SECONDS = Histogram("market_request_duration_seconds", "Dauer pro Route (ohne Senden)")
+REQUESTS = Counter("market_requests_total", "Requests pro Route und Status")
+UPSTREAM_CALLS = Counter("market_upstream_calls_total", "Upstream-Aufrufe nach Art")
+SCHEDULER = Counter("market_scheduler_events_total",
+                    "Upstream-Scheduler: deduped | batched | rate_wait | backoff_wait | throttled | rejected"
+                    " | circuit_open")
+CIRCUIT_STATE = Gauge("market_circuit_state", "Circuit Breaker pro Upstream: 0 closed, 1 half_open, 2 open")
+SNAPSHOTS = Counter("market_snapshot_lookups_total", "Snapshot-Abfragen: fresh | stale | build | last_good")
+CACHE_HITS = Gauge("market_cache_hits", "Treffer pro Cache seit Prozessstart")
+CACHE_MISSES = Gauge("market_cache_misses", "Fehlschläge pro Cache seit Prozessstart")
+CACHE_HIT_RATIO = Gauge("market_cache_hit_ratio", "hits / (hits + misses) pro Cache")
+
+
+# ---------- Spans / Request-Trace ----------
+class Trace:
+    """Spans eines Requests: Stufe -> Summe der Dauern (Sekunden)."""
+
+    def __init__(self, route: str):
+        self.route = route
+        self.started = time.perf_counter()
+        self.spans = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.spans[stage] = self.spans.get(stage, 0.0) + seconds
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        with self._lock:
+            spans = list(self.spans.items())
+        parts = [f"{stage};dur={sec * 1000:.1f}" for stage, sec in spans]
+        parts.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(parts)
+
+
+@contextmanager
+def trace(route: str):
+    """Request-Kontext öffnen; Spans darin landen im Server-Timing des Requests."""
+    tr = Trace(route)
+    token = _current.set(tr)
+    try:
+        yield tr
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def span(stage: str):
+    t = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - t
+        STAGE_SECONDS.observe(seconds, stage=stage)
+        tr = _current.get()
+        if tr is not None:
+            tr.add(stage, seconds)
+
+
+def observe_request(route: str, status: int, seconds: float):
+    REQUEST_SECONDS.observe(seconds, route=route)
+    REQUESTS.inc(route=route, status=str(status))
+
+
+def observe_caches(caches: dict):
+    """Trefferzahlen der TTL-Caches (cache.CACHES) in die Gauges übernehmen."""
+    for name, cache in caches.items():
+        hits, misses = cache.hits, cache.misses
+        CACHE_HITS.set(hits, cache=name)
+        CACHE_MISSES.set(misses, cache=name)
+        if hits + misses:
+            CACHE_HIT_RATIO.set(hits / (hits + misses), cache=name)
@@ -0,0 +1,23 @@
+# api/analytics.py
+# Vercel-Endpoint; Portfolio-Kennzahlen der Watchlist, Logik in api/_lib (analytics.py/market.py).
+import os
+import sys
+
+# api/ auf den Pfad, damit api/_lib importierbar ist (Vercel + lokal)
+_API_DIR = os.path.dirname(os.path.abspath(__file__))
+if _API_DIR not in sys.path:
+    sys.path.insert(0, _API_DIR)
+
+from _lib import boot, routes
+from _lib.http import JSONHandler
+from _lib.market import build_analytics
+from _lib.snapshot import refresher
+
+# Standardliste vorberechnen lassen (Refresher-Thread, siehe _lib/snapshot.py)
+refresher.register("analytics", build_analytics)
+boot.mark("analytics")
+
+
+class handler(JSONHandler):
+    def do_GET(self):
+        return self._reply(routes.analytics(self.path))
@@ -0,0 +1,20 @@
+# api/metrics.py
+# Prometheus-Metriken dieser Instanz: Stufen-Histogramme, Request-Dauer,
+# Upstream-Aufrufe, Snapshot- und Cache-Trefferquoten.
+import os
+import sys
+
+# api/ auf den Pfad, damit api/_lib importierbar ist (Vercel + lokal)
+_API_DIR = os.path.dirname(os.path.abspath(__file__))
+if _API_DIR not in sys.path:
+    sys.path.insert(0, _API_DIR)
+
+from _lib import boot, routes
+from _lib.http import JSONHandler
+
+boot.mark("metrics")
+
+
+class handler(JSONHandler):
+    def do_GET(self):
+        return self._reply(routes.metrics(self.path))
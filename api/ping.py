@@ -1,12 +1,20 @@
 # api/ping.py
-from http.server import BaseHTTPRequestHandler
-import json
+# Health-Check + Warm-up: ?warm=1 lädt die schweren Imports und baut die
+# Standard-Snapshots vor, damit der erste echte Request warm ist.
+import os
+import sys
 
-class handler(BaseHTTPRequestHandler):
+# api/ auf den Pfad, damit api/_lib importierbar ist (Vercel + lokal)
+_API_DIR = os.path.dirname(os.path.abspath(__file__))
+if _API_DIR not in sys.path:
+    sys.path.insert(0, _API_DIR)
+
+from _lib import boot, routes
+from _lib.http import JSONHandler
+
+boot.mark("ping")
+
+
+class handler(JSONHandler):
     def do_GET(self):
-        body = json.dumps({"ok": True}).encode()
-        self.send_response(200)
-        self.send_header("Content-Type", "application/json")
-        self.send_header("Content-Length", str(len(body)))
-        self.end_headers()
-        self.wfile.write(body)
\ No newline at end of file
+        return self._reply(routes.ping(self.path))
@@ -0,0 +1,55 @@
+# api/stream.py
+# Server-Sent Events: einmal voller Snapshot, danach nur geänderte Items.
+# Das Frontend nutzt ihn statt Polling nur mit dem ASGI-Dienst (NEXT_PUBLIC_MARKET_STREAM=1).
+import os
+import sys
+
+# api/ auf den Pfad, damit api/_lib importierbar ist (Vercel + lokal)
+_API_DIR = os.path.dirname(os.path.abspath(__file__))
+if _API_DIR not in sys.path:
+    sys.path.insert(0, _API_DIR)
+
+from _lib import boot
+from _lib.http import JSONHandler
+from _lib.stream import (MAX_STREAM_SECONDS, StreamSession, full_events, parse_topics,
+                         register_topics)
+
+register_topics()
+boot.mark("stream")
+
+
+class handler(JSONHandler):
+    def do_GET(self):
+        topics, error = parse_topics(self.path)
+        if error:
+            return self._send_json({"error": error}, 400)
+
+        self.send_response(200)
+        self._cors()
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("X-Accel-Buffering", "no")
+        self.end_headers()
+
+        session = StreamSession(topics, MAX_STREAM_SECONDS)
+        try:
+            self._write_all(session.opening())
+            while session.running():
+                if session.take_resync():
+                    self._write_all(full_events(topics))
+                self._write(session.next_event())
+            self._write(session.closing())
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            session.close()
+
+    # ---------- helpers ----------
+    def _write_all(self, events):
+        for event in events:
+            self.wfile.write(event)
+        self.wfile.flush()
+
+    def _write(self, data: bytes):
+        self.wfile.write(data)
+        self.wfile.flush()
@@ -5,6 +5,7 @@ import dynamic from 'next/dynamic';
 
 type Item = {
   name: string;
+  ticker?: string;
   value: number | null;
   delta1d: number | null;
   mtd?: number | null;   // NEU (optional)
@@ -45,6 +46,23 @@ const fmtUSDabbr = (n?: number | null) => {
 };
 
 const API_BASE = process.env.NEXT_PUBLIC_API_BASE || '';
+// SSE nur mit dem eigenen ASGI-Dienst (api/_lib/service.py); auf Vercel endet jede
+// Funktion nach 10s, ein Stream pro Tab wäre dort teurer als das Polling
+const USE_STREAM = process.env.NEXT_PUBLIC_MARKET_STREAM === '1';
+
+// SSE-Delta: geänderte Items nach Ticker einmischen, Reihenfolge vom Server
+type Delta<T> = { asOf?: string; changed: T[]; removed: string[]; order: string[] };
+function applyDelta<T extends { ticker?: string; name: string }>(
+  prev: { asOf?: string; items?: T[] } | null,
+  d: Delta<T>,
+) {
+  const key = (it: T) => it.ticker ?? it.name;
+  const byKey = new Map((prev?.items ?? []).map((it) => [key(it), it] as [string, T]));
+  d.removed.forEach((k) => byKey.delete(k));
+  d.changed.forEach((it) => byKey.set(key(it), it));
+  const items = d.order.map((k) => byKey.get(k)).filter((it): it is T => it != null);
+  return { ...(prev ?? {}), asOf: d.asOf ?? prev?.asOf, items };
+}
 
 const MarketBar = dynamic(() => import('./components/MarketBar'), {
   ssr: false,
@@ -102,7 +120,7 @@ async function loadWatchlist() {
   setWlLoading(true);
   setWlErr(null);
   try {
-    const res = await fetch(`${API_BASE}/api/watchlist`, { cache: 'no-store' });
+    const res = await fetch(`${API_BASE}/api/watchlist`, { cache: 'no-cache' });
     const j: WLResp = await res.json();
     if (!res.ok || j.error) throw new Error(j.error || `HTTP ${res.status}`);
     setWl(j);
@@ -118,7 +136,7 @@ async function load() {
     setErr(null);
     try {
       const url = `${API_BASE}/api/quotes`; // lokal: absolute URL nach Vercel, prod: /api/quotes
-      const res = await fetch(url, { cache: 'no-store' });
+      const res = await fetch(url, { cache: 'no-cache' });
 
       // Versuche erst JSON; wenn das scheitert, lies Text und zeige ihn an
       let body: ApiResp | null = null;
@@ -150,11 +168,30 @@ useEffect(() => {
   window.localStorage.setItem('autoRefresh', String(autoRefresh));
   if (!autoRefresh) return;
 
-  const id = setInterval(() => {
-    load();
-  }, 15 * 60 * 1000); // 15 Minuten
+  // Live-Updates per Server-Sent Events, wenn der ASGI-Dienst läuft;
+  // sonst (Vercel, ohne EventSource-Support) das 15-Minuten-Intervall
+  if (!USE_STREAM || typeof EventSource === 'undefined') {
+    const id = setInterval(() => {
+      load();
+    }, 15 * 60 * 1000); // 15 Minuten
+    return () => clearInterval(id);
+  }
 
-  return () => clearInterval(id);
+  const es = new EventSource(`${API_BASE}/api/stream`);
+  es.addEventListener('snapshot', (ev) => {
+    const m = JSON.parse((ev as MessageEvent).data);
+    if (m.topic === 'quotes') { setData(m.body); setErr(null); setLoading(false); }
+    if (m.topic === 'watchlist') { setWl(m.body); setWlErr(null); setWlLoading(false); }
+    setLastRefresh(new Date());
+  });
+  es.addEventListener('delta', (ev) => {
+    const m = JSON.parse((ev as MessageEvent).data);
+    if (m.topic === 'quotes') setData((prev) => applyDelta<Item>(prev, m));
+    if (m.topic === 'watchlist') setWl((prev) => applyDelta<WLItem>(prev, m));
+    setLastRefresh(new Date());
+  });
+
+  return () => es.close();
 }, [autoRefresh]);
 
   // Reload, wenn Tab wieder sichtbar ist
@@ -196,7 +233,7 @@ useEffect(() => { loadWatchlist(); }, []);
             checked={autoRefresh}
             onChange={(e) => setAutoRefresh(e.target.checked)}
           />
-          Auto(15min)
+          {USE_STREAM ? 'Live' : 'Auto(15min)'}
         </label>
       </div>
     </div>
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Reproduzierbarer Benchmark für /api/quotes und /api/watchlist, ohne Yahoo.
+
+Pro Endpoint und Watchlist-Größe läuft ein eigener Prozess (saubere Caches,
+eigener Peak-RSS) mit dem Fake-Provider (api/_lib/fake.py) hinter dem
+echten Vercel-Handler. Gemessen werden drei Phasen:
+
+- cold:    erster Request, alle Caches leer
+- warm:    wiederholte Requests, Antwort aus dem Snapshot
+- rebuild: Snapshot verworfen, History/Meta-Caches warm (periodischer Neuaufbau)
+
+Je Phase: Latenz-Perzentile, Upstream-Aufrufe, CPU-Zeit; je Prozess Peak-RSS.
+
+    python bench/bench_api.py                      # 10/100/1000 Symbole
+    python bench/bench_api.py --sizes 10,100 --json bench.json
+    python bench/bench_api.py --fixture fx.json    # aufgezeichnete Daten abspielen
+    python bench/bench_api.py --record fx.json     # Fixture live von Yahoo aufzeichnen
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_DIR = os.path.join(ROOT, "api")
+
+ENDPOINTS = ("quotes", "watchlist")
+PHASES = ("cold", "warm", "rebuild")
+
+
+def percentile(values, p: float):
+    if not values:
+        return None
+    s = sorted(values)
+    k = max(0, min(len(s) - 1, round(p / 100 * len(s) + 0.5) - 1))
+    return s[k]
+
+
+def symbols_for(size: int):
+    return [f"BM{i:04d}" for i in range(size)]
+
+
+def max_rss_mb() -> float:
+    # Linux: KiB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# ---------- Worker (ein Prozess pro Endpoint/Größe) ----------
+def _get(url: str):
+    try:
+        with urllib.request.urlopen(url, timeout=120) as r:
+            return r.status, r.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def run_worker(endpoint: str, size: int, requests: int, rebuilds: int) -> dict:
+    import importlib
+    from http.server import ThreadingHTTPServer
+
+    sys.path.insert(0, API_DIR)
+    rss_base = max_rss_mb()
+    mod = importlib.import_module(endpoint)
+    from _lib.provider import provider
+    from _lib.snapshot import refresher
+
+    rss_import = max_rss_mb()
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), mod.handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{srv.server_address[1]}/api/{endpoint}?symbols=" + ",".join(symbols_for(size))
+
+    def phase(n: int, before_each=None):
+        calls = dict(provider.calls)
+        cpu = time.process_time()
+        lat, statuses, body = [], {}, b""
+        for _ in range(n):
+            if before_each:
+                before_each()
+            t = time.perf_counter()
+            status, body = _get(url)
+            lat.append((time.perf_counter() - t) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+        return {
+            "n": n,
+            "p50_ms": percentile(lat, 50),
+            "p95_ms": percentile(lat, 95),
+            "p99_ms": percentile(lat, 99),
+            "max_ms": max(lat),
+            "cpu_ms": (time.process_time() - cpu) * 1000,
+            "upstream": {k: v - calls.get(k, 0) for k, v in provider.calls.items() if v - calls.get(k, 0)},
+            "status": statuses,
+            "item_errors": _item_errors(body),
+        }
+
+    out = {"endpoint": endpoint, "size": size, "rss_base_mb": rss_base, "rss_import_mb": rss_import}
+    out["cold"] = phase(1)
+    out["warm"] = phase(requests)
+    out["rebuild"] = phase(rebuilds, before_each=refresher.store.clear)
+    out["rss_peak_mb"] = max_rss_mb()
+    srv.shutdown()
+    return out
+
+
+def _item_errors(body: bytes) -> int:
+    try:
+        return sum(1 for it in json.loads(body).get("items", []) if it.get("error"))
+    except Exception:
+        return -1
+
+
+# ---------- Treiber ----------
+def worker_env(args) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "MARKET_PROVIDER": "fake",
+        "MARKET_CACHE_BACKEND": "memory",    # kein /tmp-Zustand zwischen Läufen
+        "MARKET_REFRESH_INTERVAL": "0",      # kein Hintergrund-Refresh während der Messung
+        "MARKET_MAX_SYMBOLS": str(max(args.sizes)),
+        "MARKET_FAKE_LATENCY_MS": str(args.latency_ms),
+        "MARKET_FAKE_PER_SYMBOL_MS": str(args.per_symbol_ms),
+        "MARKET_FAKE_JITTER_MS": str(args.jitter_ms),
+        "MARKET_FAKE_FAIL_RATE": str(args.fail_rate),
+        "MARKET_FAKE_MISSING_RATE": str(args.missing_rate),
+        "MARKET_FAKE_SEED": str(args.seed),
+    })
+    if args.fixture:
+        env["MARKET_FAKE_FIXTURE"] = os.path.abspath(args.fixture)
+    return env
+
+
+def run_one(args, endpoint: str, size: int) -> dict:
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker", endpoint, str(size),
+           "--requests", str(args.requests), "--rebuilds", str(args.rebuilds)]
+    proc = subprocess.run(cmd, env=worker_env(args), capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {"endpoint": endpoint, "size": size, "error": proc.stderr.strip()[-500:]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def fmt(v, width=8):
+    if v is None:
+        return "-".rjust(width)
+    return f"{v:{width}.1f}"
+
+
+def print_table(results):
+    head = (f"{'endpoint':<10}{'size':>6} {'phase':<8}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}"
+            f"{'cpu':>9}  {'upstream':<40}{'rss':>8}")
+    print(head)
+    print("-" * len(head))
+    for r in results:
+        if "error" in r:
+            print(f"{r['endpoint']:<10}{r['size']:>6} ERROR {r['error']}")
+            continue
+        for ph in PHASES:
+            p = r[ph]
+            ups = " ".join(f"{k}={v}" for k, v in sorted(p["upstream"].items())) or "-"
+            if p["item_errors"]:
+                ups += f" [item errors: {p['item_errors']}]"
+            rss = fmt(r["rss_peak_mb"]) if ph == "cold" else ""
+            print(f"{r['endpoint']:<10}{r['size']:>6} {ph:<8}{fmt(p['p50_ms'])}{fmt(p['p95_ms'])}"
+                  f"{fmt(p['p99_ms'])}{fmt(p['max_ms'])}{fmt(p['cpu_ms'], 9)}  {ups:<40}{rss}")
+    print("\nZeiten in ms, rss = Peak-RSS des Prozesses in MiB")
+
+
+def record_fixture(path: str):
+    sys.path.insert(0, API_DIR)
+    from _lib.fake import record
+    from _lib.market import TICKERS, WATCH
+    from _lib.provider import YahooProvider
+
+    tickers = list(dict.fromkeys([*TICKERS.values(), *WATCH.values()]))
+    n = record(YahooProvider(), tickers, path)
+    print(f"{n}/{len(tickers)} Serien nach {path} geschrieben")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--sizes", default="10,100,1000",
+                    type=lambda s: [int(x) for x in s.split(",") if x])
+    ap.add_argument("--endpoints", default=",".join(ENDPOINTS),
+                    type=lambda s: [x for x in s.split(",") if x])
+    ap.add_argument("--requests", type=int, default=50, help="Requests in der warm-Phase")
+    ap.add_argument("--rebuilds", type=int, default=5, help="Requests in der rebuild-Phase")
+    ap.add_argument("--latency-ms", type=float, default=80.0)
+    ap.add_argument("--per-symbol-ms", type=float, default=0.5)
+    ap.add_argument("--jitter-ms", type=float, default=10.0)
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    ap.add_argument("--missing-rate", type=float, default=0.0)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--fixture", help="Fixture-JSON (siehe --record)")
+    ap.add_argument("--json", help="Ergebnisse zusätzlich als JSON schreiben")
+    ap.add_argument("--record", metavar="PATH", help="Fixture live aufzeichnen und beenden")
+    ap.add_argument("--worker", nargs=2, metavar=("ENDPOINT", "SIZE"), help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.worker:
+        endpoint, size = args.worker
+        print(json.dumps(run_worker(endpoint, int(size), args.requests, args.rebuilds)))
+        return 0
+    if args.record:
+        record_fixture(args.record)
+        return 0
+
+    results = []
+    for endpoint in args.endpoints:
+        if endpoint not in ENDPOINTS:
+            ap.error(f"unknown endpoint: {endpoint}")
+        for size in args.sizes:
+            results.append(run_one(args, endpoint, size))
+    print_table(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Prüft die Zusagen des Spalten-Stores (api/_lib/columns.py) ohne Upstream.
+
+Jeder Fall läuft in einem frischen Verzeichnis; "anderer Prozess" heißt eine
+zweite ColumnBackend-Instanz auf demselben Verzeichnis (eigene mmaps, eigener
+Index-Stand). Abbrüche werden durch Schreiben halber Dateien/Zeilen simuliert.
+
+    python bench/check_columns.py          # alle Fälle, Exit-Code 1 bei Fehlern
+    python bench/check_columns.py -v       # jeden Fall einzeln melden
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "api"))
+
+from _lib.columns import INDEX, ColumnBackend  # noqa: E402
+
+KEY = ("AAA", "1d", "1y")
+T0 = 739000
+TTL = 3600
+
+
+def series(n: int, start: int = 0, scale: float = 1.0):
+    return list(range(T0 + start, T0 + start + n)), [scale * (100.0 + i) for i in range(start, start + n)]
+
+
+def put(cb, bars):
+    cb.set(KEY, {"bars": bars, "fetched": time.time()}, time.time() + TTL)
+
+
+def read(cb):
+    hit = cb.get(KEY)
+    if hit is None:
+        return None
+    dates, closes = hit[1]["bars"]
+    return list(dates), list(closes)
+
+
+def data_files(root):
+    return sorted(n for n in os.listdir(root) if n.endswith((".d", ".c")))
+
+
+# ---------- Fälle ----------
+def case_roundtrip(root):
+    bars = series(300)
+    put(ColumnBackend(root), bars)
+    assert read(ColumnBackend(root)) == bars
+
+
+def case_torn_index_line(root):
+    bars = series(10)
+    put(ColumnBackend(root), bars)
+    # Abbruch mitten im nächsten Commit: halbe Index-Zeile ohne CRC
+    with open(os.path.join(root, INDEX), "ab") as f:
+        f.write(b'{"k":"x","n":"dead')
+    cb = ColumnBackend(root)
+    assert read(cb) == bars
+    # der nächste Commit darf die halbe Zeile nicht mitreißen
+    more = series(11)
+    put(cb, more)
+    assert read(ColumnBackend(root)) == more
+
+
+def case_uncommitted_rows(root):
+    bars = series(10)
+    put(ColumnBackend(root), bars)
+    # Abbruch nach dem Daten-Append, vor dem Index-Eintrag
+    for n in data_files(root):
+        with open(os.path.join(root, n), "ab") as f:
+            f.write(b"\x7f" * 21)
+    cb = ColumnBackend(root)
+    assert read(cb) == bars
+    more = series(12)
+    put(cb, more)
+    assert read(ColumnBackend(root)) == more
+
+
+def case_append_in_place(root):
+    cb = ColumnBackend(root)
+    put(cb, series(10))
+    files = data_files(root)
+    d, c = series(12)
+    c[9] = 555.0   # laufender Handelstag hat sich bewegt
+    put(cb, (d, c))
+    assert data_files(root) == files, "Append darf keine neue Generation anlegen"
+    assert read(ColumnBackend(root)) == (d, c)
+
+
+def case_handed_out_closes_stable(root):
+    cb = ColumnBackend(root)
+    put(cb, series(10))
+    _, closes = cb.get(KEY)[1]["bars"]
+    before = list(closes)
+    d, c = series(10)
+    c[-1] = 12.5   # nur der letzte Close ändert sich -> pwrite in place
+    put(cb, (d, c))
+    assert list(closes) == before, "ausgegebene Closes haben sich nachträglich geändert"
+    assert read(cb)[1][-1] == 12.5
+
+
+def case_split_new_generation(root):
+    cb = ColumnBackend(root)
+    put(cb, series(10))
+    old = data_files(root)
+    split = series(10, scale=0.5)
+    put(cb, split)
+    assert data_files(root) != old and len(data_files(root)) == 2
+    assert read(ColumnBackend(root)) == split
+
+
+def case_recreate_after_delete(root):
+    reader, writer = ColumnBackend(root), ColumnBackend(root)
+    put(writer, series(10))
+    assert read(reader) == series(10)          # reader hält jetzt eine mmap
+    writer.delete(KEY)
+    fresh = series(10, scale=3.0)              # gleiche Länge, anderer Inhalt
+    put(writer, fresh)
+    assert read(reader) == fresh, "alte mmap nach Löschen wiederverwendet"
+
+
+def case_log_compaction(root):
+    cb = ColumnBackend(root)
+    for i in range(3000):
+        d, c = series(5)
+        c[-1] = float(i)
+        put(cb, (d, c))
+    assert os.path.getsize(os.path.join(root, INDEX)) < (1 << 20) + 4096
+    assert read(ColumnBackend(root))[1][-1] == 2999.0
+
+
+def case_budget(root):
+    cb = ColumnBackend(root, budget_mb=0.01)
+    for i in range(20):
+        cb.set((f"T{i}", "1d", "1y"), {"bars": series(100), "fetched": time.time() + i}, time.time() + TTL)
+    assert cb.size_bytes() <= 0.01 * 1024 * 1024
+    assert cb.get(("T19", "1d", "1y")) is not None and cb.get(("T0", "1d", "1y")) is None
+
+
+CASES = [(name[5:], fn) for name, fn in sorted(globals().items()) if name.startswith("case_")]
+
+
+def main(argv=None):
+    verbose = "-v" in (argv or sys.argv[1:])
+    failed = 0
+    for name, fn in CASES:
+        root = tempfile.mkdtemp(prefix="columns-check-")
+        try:
+            fn(root)
+            if verbose:
+                print(f"ok    {name}")
+        except AssertionError as e:
+            failed += 1
+            print(f"FAIL  {name}: {e}")
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+    print(f"{len(CASES) - failed}/{len(CASES)} Fälle ok")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())